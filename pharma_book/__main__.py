@@ -0,0 +1,9 @@
+# python -m pharma_book: the headless commands in cli.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+sys.exit(main())
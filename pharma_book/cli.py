@@ -0,0 +1,145 @@
+"""
+Headless commands for scheduled runs, without the Tk dashboard.
+
+  reconcile  import claim files, price them against the inclusion lists and
+             write the owed amounts of a period as CSV, Parquet or PDF
+
+Uses the app's own app.db and inclusion_lists/. Only the output format that is
+asked for is loaded: reportlab for .pdf, a Parquet engine (pyarrow) for .parquet.
+
+Run: python -m pharma_book reconcile --from 2025-07-01 --to 2025-07-31 [--pbm NAME]
+     [--filter Underpaid] [--import claims.xlsx ...] [--out owed.csv|owed.parquet|owed.pdf]
+"""
+import argparse
+import importlib.util
+import os
+import sys
+from datetime import date
+
+from helpers.claims_query import fetch_claims, fetch_kpis, fetch_summary
+from helpers.db_helpers import DatabaseHelper
+from helpers.import_helpers import claims_cache, parse_claims_files, write_claims
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_FORMATS = ('csv', 'parquet', 'pdf')
+# Columns written to CSV/Parquet, in order
+RECONCILE_COLUMNS = [
+    'date_dispensed', 'script', 'pbm_name', 'bin', 'drug_ndc', 'drug_name', 'qty', 'aac', 'method',
+    'expected_paid', 'total_paid', 'new_paid', 'difference', 'updated_diff', 'status',
+]
+
+
+def output_format(args):
+    fmt = args.format or os.path.splitext(args.out)[1].lower().lstrip('.')
+    if fmt not in OUTPUT_FORMATS:
+        raise SystemExit(f"Unknown output format for {args.out}; use --format {'/'.join(OUTPUT_FORMATS)}")
+    if fmt == 'parquet' and not any(importlib.util.find_spec(m) for m in ('pyarrow', 'fastparquet')):
+        raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+    return fmt
+
+
+def import_files(db, paths, workers=None):
+    # Same parse (process pool, saved column mappings) and write (one transaction, large CSVs
+    # streamed chunk by chunk) as the dashboard's Import; returns the number of files not imported
+    problems = 0
+
+    def report(kind, path, info):
+        nonlocal problems
+        name = os.path.basename(path)
+        if kind == 'parsed':
+            print(f"Read {name}: {len(info[0])} rows ({info[1]})")
+            return
+        if kind == 'streamed':
+            print(f"Streaming {name} in chunks ({info[1]})")
+            return
+        problems += 1
+        if kind == 'skipped':
+            print(f"Skipped {name}: missing required columns {', '.join(info[0])}. "
+                  f"Detected headers: {info[1]['headers']}", file=sys.stderr)
+        else:
+            print(f"Could not read {name}: {info}", file=sys.stderr)
+
+    known = {sig: mapping for sig, (mapping, _) in db.headers.mappings().items()}
+    parsed = parse_claims_files(paths, mappings=known, max_workers=workers, on_file=report, cache=claims_cache(db.frame_cache))
+    for path, _, layout in parsed:
+        if not layout['known']:
+            # Remembered unconfirmed; the dashboard asks to confirm it on its next import
+            db.headers.save(layout['headers'], layout['mapping'])
+            print(f"New column layout in {os.path.basename(path)}; mapping saved unconfirmed")
+    if parsed:
+        inserted, updated = write_claims(
+            db, parsed, on_rows=lambda path, rows: print(f"  {os.path.basename(path)}: {rows:,} rows"),
+            on_file=report
+        )
+        print(f"Imported {len(parsed)} file(s): {inserted} inserted, {updated} updated")
+    return problems
+
+
+def write_output(df, path, fmt, title, email):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if fmt == 'pdf':
+        from helpers.pdf_helpers import PDFHelper
+        df = df.sort_values(['pbm_name', 'date_dispensed', 'script'], kind='stable')
+        PDFHelper(os.path.dirname(path)).render(df, path, title, email=email, subtotals=True)
+        return
+    df = df[RECONCILE_COLUMNS]
+    if fmt == 'csv':
+        df = df.assign(date_dispensed=df['date_dispensed'].dt.strftime('%Y-%m-%d'))
+        df.to_csv(path, index=False, float_format='%.2f')
+    else:
+        df.to_parquet(path, index=False)
+
+
+def reconcile(args):
+    fmt = output_format(args) if args.out else None
+    db = DatabaseHelper(BASE_DIR)
+    try:
+        loads = db.load_inclusion_lists()
+        print("Reference data: " + ", ".join(
+            f"{r['table']} {r['source']} ({r['seconds'] * 1000:.0f} ms)" for r in loads
+        ))
+        problems = import_files(db, args.imports, args.workers)
+        df = fetch_claims(db, args.start, args.end, args.filter, args.pbm)
+        kpis = fetch_kpis(db, args.start, args.end, args.filter, args.pbm)
+        summary = fetch_summary(db, args.start, args.end, args.filter, args.pbm)
+    finally:
+        db.close()
+
+    label = 'claims' if args.filter == 'All' else f"{args.filter.lower()} claims"
+    print(f"{len(df)} {label} from {args.start} to {args.end}")
+    for pbm, difference in summary.itertuples(index=False, name=None):
+        print(f"  {pbm:<30} {difference:>12.2f}")
+    print(f"Underpaid (commercial): {kpis['underpaid_total']:.2f} over {kpis['script_count']} scripts; "
+          f"updated difference: {kpis['updated_diff_total']:.2f}")
+    if args.out:
+        title = args.pbm if args.pbm != 'All' else 'All PBMs'
+        write_output(df, args.out, fmt, title, args.email)
+        print(f"Wrote {args.out}")
+    return 1 if problems else 0
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog='python -m pharma_book', description=__doc__.splitlines()[1])
+    sub = ap.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('reconcile', help='import, price and export the owed amounts of a period')
+    rec.add_argument('--from', dest='start', type=date.fromisoformat, required=True)
+    rec.add_argument('--to', dest='end', type=date.fromisoformat, required=True)
+    rec.add_argument('--pbm', default='All', help='PBM name, Federal, or All (default)')
+    rec.add_argument('--filter', default='Underpaid', choices=['All', 'Underpaid', 'Overpaid'])
+    rec.add_argument('--import', dest='imports', nargs='+', default=[], metavar='FILE',
+                     help='claim exports (CSV/XLS/XLSX) to upsert first')
+    rec.add_argument('--workers', type=int, default=None, help='processes parsing the imports (default: CPU count)')
+    rec.add_argument('--out', help='output file; the format follows the extension')
+    rec.add_argument('--format', choices=OUTPUT_FORMATS, help='output format when --out has another extension')
+    rec.add_argument('--email', default=None, help='email printed under the PDF title')
+    rec.set_defaults(func=reconcile)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from helpers.claims_query import fetch_claims
+from helpers.pdf_helpers import PDFHelper, REPORT_FOLDERS
+
+# Report type -> rows of one PBM's underpaid claims that go into it
+BATCH_REPORTS = [
+    ('Commercial Dollars', lambda df: df[df['pbm_name'] != 'Federal']),
+    ('Updated Commercial Payments', lambda df: df[(df['pbm_name'] != 'Federal') & df['new_paid'].notna()]),
+    ('Federal Dollars', lambda df: df[df['pbm_name'] == 'Federal']),
+]
+EXPORT_COLUMNS = ['date_dispensed', 'script', 'qty', 'aac', 'expected_paid', 'total_paid', 'difference', 'pbm_name']
+
+
+def _render(report_dir, df_export, folder, pbm, start, end, email):
+    # Runs in a pool process
+    return PDFHelper(report_dir).save_pdf(df_export, folder, pbm, start, end, email=email)
+
+
+class BatchReports:
+    """Month-end packet: every PBM's underpaid reports for a period in one run.
+
+    Claims are fetched and priced once, split by pbm_name, and each PBM's
+    Commercial/Updated/Federal PDF is rendered in a process pool. Scripts that
+    already have a saved report of a type are left out, as with Save PDF.
+    """
+
+    def __init__(self, db, report_dir, max_workers=None):
+        self.db = db
+        self.report_dir = report_dir
+        self.max_workers = max_workers
+
+    def plan(self, start, end, profile_email=''):
+        df = fetch_claims(self.db, start, end, 'Underpaid', 'All')
+        existing = {tuple(r) for r in self.db.conn.execute(
+            "SELECT script, report_type FROM report_files WHERE pdf_file IS NOT NULL AND pdf_file<>''"
+        )}
+        jobs = []
+        for pbm, df_pbm in df.groupby('pbm_name', sort=True):
+            for title, select in BATCH_REPORTS:
+                rows = select(df_pbm)
+                rows = rows[[(s, title) not in existing for s in rows['script']]]
+                if rows.empty:
+                    continue
+                email = profile_email or rows['email'].iloc[0]
+                jobs.append((title, pbm, rows[EXPORT_COLUMNS], email))
+        return jobs
+
+    def run(self, jobs, start, end, check=None, on_progress=None):
+        """Render the planned jobs and record them; returns [(report_type, relative pdf path, scripts)].
+
+        ``check`` is called between reports and may raise to stop the batch;
+        ``on_progress(done, total, report_type, pbm)`` follows each finished report.
+        Every report written is recorded, in one transaction, even when a render
+        fails or the batch is stopped.
+        """
+        if not jobs:
+            return []
+        futures, finished = {}, 0
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(_render, self.report_dir, rows, REPORT_FOLDERS[title], pbm, start, end, email):
+                        (title, pbm, list(rows['script'].unique()))
+                    for title, pbm, rows, email in jobs
+                }
+                try:
+                    for future in as_completed(futures):
+                        title, pbm, _ = futures[future]
+                        future.result()
+                        finished += 1
+                        if on_progress:
+                            on_progress(finished, len(jobs), title, pbm)
+                        if check:
+                            check()
+                except BaseException:
+                    # Reports not started are dropped; the ones already rendering are waited for
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+        except BaseException as e:
+            # Every PDF written is linked to its scripts, or the next batch would render it again.
+            # The render error or stop is what the caller sees; a failure to record is noted on it
+            try:
+                self.record(self.written(futures))
+            except Exception as err:
+                e.add_note(f"The reports already written were not recorded: {err!r}")
+            raise
+        results = self.written(futures)
+        self.record(results)
+        return results
+
+    def written(self, futures):
+        # [(report_type, relative pdf path, scripts)] of the renders that finished
+        return [
+            (title, os.path.join(REPORT_FOLDERS[title], os.path.basename(future.result())), scripts)
+            for future, (title, _, scripts) in futures.items()
+            if future.done() and not future.cancelled() and future.exception() is None
+        ]
+
+    def record(self, results):
+        # All report_files rows of the batch in one transaction
+        if not results:
+            return None
+        return self.db.attach_reports(results)
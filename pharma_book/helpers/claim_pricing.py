@@ -0,0 +1,137 @@
+import json
+import pandas as pd
+from helpers.pricing import price_claims
+from helpers.reference_cache import normalize_ndc
+
+PRICING_COLUMNS = ['script', 'date_dispensed', 'pbm_name', 'aac', 'method', 'expected_paid', 'difference', 'updated_diff']
+# Reference table -> user_data column its keys match
+REPRICE_KEYS = {'baseline': 'drug_ndc', 'alt_rates': 'drug_ndc', 'pbm_info': 'bin'}
+# Daily claim_rollup row for each (date_dispensed, pbm_name) of claim_pricing
+ROLLUP_SELECT = """
+    SELECT date_dispensed, pbm_name,
+           COUNT(*),
+           SUM(CASE WHEN difference < 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN difference > 0 THEN 1 ELSE 0 END),
+           TOTAL(CASE WHEN difference < 0 THEN difference END),
+           TOTAL(CASE WHEN difference > 0 THEN difference END),
+           TOTAL(updated_diff),
+           TOTAL(CASE WHEN difference < 0 THEN updated_diff END),
+           TOTAL(CASE WHEN difference > 0 THEN updated_diff END)
+    FROM claim_pricing
+"""
+
+
+class ClaimPricing:
+    """Persisted per-claim pricing in ``claim_pricing``, kept in step with user_data.
+
+    Rows are priced with ``price_claims`` (the same code the dashboard used to run
+    on every refresh) and only recomputed for the scripts an import touched, or for
+    the claims whose NDC/BIN changed in baseline, alt_rates or pbm_info.
+    pbm_name is stored resolved, with 'Federal' for BINs not in pbm_info.
+
+    ``claim_rollup`` sums claim_pricing per (date_dispensed, pbm_name); every
+    reprice rebuilds the rollup rows of the dates it touched.
+    """
+
+    def __init__(self, connections, reference):
+        self.connections = connections
+        self.reference = reference
+
+    @property
+    def conn(self):
+        # The calling thread's connection
+        return self.connections.conn
+
+    def ensure_tables(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS claim_pricing (
+                script TEXT PRIMARY KEY,
+                date_dispensed TEXT,
+                pbm_name TEXT,
+                aac REAL,
+                method TEXT,
+                expected_paid REAL,
+                difference REAL,
+                updated_diff REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_claim_pricing_date ON claim_pricing(date_dispensed)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_claim_pricing_pbm_date ON claim_pricing(pbm_name, date_dispensed)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS claim_rollup (
+                date_dispensed TEXT,
+                pbm_name TEXT,
+                claims INTEGER,
+                underpaid_claims INTEGER,
+                overpaid_claims INTEGER,
+                underpaid REAL,
+                overpaid REAL,
+                updated_diff REAL,
+                underpaid_updated_diff REAL,
+                overpaid_updated_diff REAL,
+                PRIMARY KEY (date_dispensed, pbm_name)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def _refresh_rollup(self, dates):
+        dates = json.dumps(sorted({d for d in dates if d}))
+        self.conn.execute("DELETE FROM claim_rollup WHERE date_dispensed IN (SELECT value FROM json_each(?))", (dates,))
+        self.conn.execute(
+            f"INSERT INTO claim_rollup {ROLLUP_SELECT} WHERE date_dispensed IN (SELECT value FROM json_each(?)) GROUP BY 1, 2",
+            (dates,)
+        )
+
+    def rebuild_rollup(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM claim_rollup")
+            self.conn.execute(f"INSERT INTO claim_rollup {ROLLUP_SELECT} WHERE date_dispensed IS NOT NULL GROUP BY 1, 2")
+
+    def ensure_rollup(self):
+        # Built once from claim_pricing if it was created after the claims were priced
+        empty = self.conn.execute("SELECT NOT EXISTS (SELECT 1 FROM claim_rollup)").fetchone()[0]
+        if empty and self.conn.execute("SELECT EXISTS (SELECT 1 FROM claim_pricing)").fetchone()[0]:
+            self.rebuild_rollup()
+
+    def reprice(self, where="1", params=()):
+        """Recompute claim_pricing for the user_data rows (alias u) matching ``where``.
+
+        Runs on the caller's transaction; returns the number of rows priced.
+        """
+        df = pd.read_sql_query(
+            f"SELECT script, date_dispensed, drug_ndc, qty, total_paid, new_paid, bin FROM user_data u WHERE {where}",
+            self.conn, params=list(params)
+        )
+        if df.empty:
+            return 0
+        df['ndc'] = normalize_ndc(df['drug_ndc'])
+        df = self.reference.join(df)
+        df['pbm_name'] = df['pbm_name'].fillna('Federal')
+        price_claims(df)
+        # Dates the repriced claims leave (if their date changed) and enter
+        old_dates = [r[0] for r in self.conn.execute(
+            "SELECT DISTINCT date_dispensed FROM claim_pricing WHERE script IN (SELECT value FROM json_each(?))",
+            (json.dumps(df['script'].tolist()),)
+        )]
+        rows = df[PRICING_COLUMNS].astype(object)
+        self.conn.executemany(f"""
+            INSERT INTO claim_pricing ({', '.join(PRICING_COLUMNS)}) VALUES ({', '.join('?' for _ in PRICING_COLUMNS)})
+            ON CONFLICT(script) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in PRICING_COLUMNS[1:])}
+        """, rows.where(rows.notna(), None).itertuples(index=False, name=None))
+        self._refresh_rollup(old_dates + df['date_dispensed'].tolist())
+        return len(df)
+
+    def reprice_keys(self, table, keys):
+        # Claims affected by changed/deleted reference rows of ``table``
+        if not keys:
+            return 0
+        column = REPRICE_KEYS[table]
+        if column == 'drug_ndc':
+            keys = normalize_ndc(pd.Series(list(keys))).tolist()
+        with self.conn:
+            return self.reprice(f"u.{column} IN (SELECT value FROM json_each(?))", [json.dumps(list(keys))])
+
+    def reprice_missing(self):
+        # Claims never priced yet, e.g. on the first start after upgrading
+        with self.conn:
+            return self.reprice("u.script NOT IN (SELECT script FROM claim_pricing)")
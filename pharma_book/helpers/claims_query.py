@@ -0,0 +1,100 @@
+import pandas as pd
+
+
+def _iso(d):
+    return d.strftime("%Y-%m-%d") if hasattr(d, 'strftime') else str(d)
+
+
+def _view_filter(start, end, flt, pbm):
+    # Predicates on claim_pricing p for a dashboard view
+    where = ["p.date_dispensed BETWEEN ? AND ?"]
+    params = [_iso(start), _iso(end)]
+    if pbm != 'All':
+        where.append("p.pbm_name = ?")
+        params.append(pbm)
+    if flt in ('Underpaid', 'Overpaid'):
+        where.append(f"p.difference {'<' if flt == 'Underpaid' else '>'} 0")
+    return where, params
+
+
+def build_claims_query(start, end, flt='All', pbm='All', table='"user_data"'):
+    """Build the claims SELECT for a dashboard view, with the filters pushed into SQL.
+
+    Pricing and the resolved PBM come from claim_pricing (see helpers/claim_pricing.py),
+    so the date range, PBM and Underpaid/Overpaid sign are all indexed predicates.
+    Returns (sql, params) selecting user_data columns plus the priced ones and the PBM email.
+    """
+    where, params = _view_filter(start, end, flt, pbm)
+    sql = f"""
+        SELECT u.*, p.pbm_name, COALESCE(i.email, '') AS email,
+               p.aac, p.method, p.expected_paid, p.difference, p.updated_diff
+        FROM claim_pricing p
+        JOIN {table} u ON u.script = p.script
+        LEFT JOIN pbm_info i ON i.bin = u.bin
+        WHERE """ + " AND ".join(where)
+    return sql, params
+
+
+# Per filter, the claim_rollup expressions for the claim count, the underpaid sum,
+# the difference sum and the updated-difference sum of the filtered claims
+ROLLUP_MEASURES = {
+    'All': ('claims', 'underpaid', 'underpaid + overpaid', 'updated_diff'),
+    'Underpaid': ('underpaid_claims', 'underpaid', 'underpaid', 'underpaid_updated_diff'),
+    'Overpaid': ('overpaid_claims', '0.0', 'overpaid', 'overpaid_updated_diff'),
+}
+
+
+def _rollup_filter(start, end, pbm):
+    where = ["r.date_dispensed BETWEEN ? AND ?"]
+    params = [_iso(start), _iso(end)]
+    if pbm != 'All':
+        where.append("r.pbm_name = ?")
+        params.append(pbm)
+    return where, params
+
+
+def build_kpi_query(start, end, flt='All', pbm='All'):
+    """KPI sums over the commercial (non-Federal) claims of a view, from the daily rollup."""
+    count, underpaid, _, updated = ROLLUP_MEASURES[flt]
+    where, params = _rollup_filter(start, end, pbm)
+    where.append("r.pbm_name <> 'Federal'")
+    sql = f"""
+        SELECT TOTAL({underpaid}) AS underpaid_total,
+               CAST(TOTAL({count}) AS INTEGER) AS script_count,
+               TOTAL({updated}) AS updated_diff_total
+        FROM claim_rollup r
+        WHERE """ + " AND ".join(where)
+    return sql, params
+
+
+def build_summary_query(start, end, flt='All', pbm='All'):
+    """Summed difference per PBM for a view (Summary tab), from the daily rollup."""
+    count, _, difference, _ = ROLLUP_MEASURES[flt]
+    where, params = _rollup_filter(start, end, pbm)
+    sql = f"""
+        SELECT r.pbm_name, TOTAL({difference}) AS difference
+        FROM claim_rollup r
+        WHERE """ + " AND ".join(where) + f"""
+        GROUP BY r.pbm_name
+        HAVING TOTAL({count}) > 0
+        ORDER BY r.pbm_name"""
+    return sql, params
+
+
+def fetch_claims(db, start, end, flt='All', pbm='All'):
+    """Priced claims for a view, read from claim_pricing joined to user_data."""
+    sql, params = build_claims_query(start, end, flt, pbm, table=db.QUOTED_USER_TABLE)
+    df = pd.read_sql_query(sql, db.conn, params=params)
+    df['date_dispensed'] = pd.to_datetime(df['date_dispensed'], errors='coerce')
+    df['method'] = df['method'].fillna('')
+    return df
+
+
+def fetch_kpis(db, start, end, flt='All', pbm='All'):
+    sql, params = build_kpi_query(start, end, flt, pbm)
+    return dict(db.conn.execute(sql, params).fetchone())
+
+
+def fetch_summary(db, start, end, flt='All', pbm='All'):
+    sql, params = build_summary_query(start, end, flt, pbm)
+    return pd.read_sql_query(sql, db.conn, params=params)
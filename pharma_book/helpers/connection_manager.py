@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+
+# Applied to every connection when it is opened
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",        # readers don't block the writer and vice versa
+    "PRAGMA synchronous=NORMAL",      # safe with WAL, far fewer fsyncs than FULL
+    "PRAGMA cache_size=-65536",       # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",     # 256 MiB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+]
+CACHED_STATEMENTS = 256
+
+
+class ConnectionManager:
+    """One configured sqlite3 connection (and cursor) per thread for a database file.
+
+    ``for_path()`` returns the same manager for the same file, so every
+    DatabaseHelper in the process shares it. ``run_once()`` runs a setup step
+    (schema creation) once per manager instead of once per helper.
+    """
+
+    _managers = {}
+    _managers_lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, path):
+        path = os.path.abspath(path)
+        with cls._managers_lock:
+            if path not in cls._managers:
+                cls._managers[path] = cls(path)
+            return cls._managers[path]
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._setup_lock = threading.RLock()
+        self._done = set()
+        self._open = []
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._open.append(conn)
+        return conn
+
+    def _thread_state(self):
+        if getattr(self._local, 'conn', None) is None:
+            self._local.conn = self._connect()
+            self._local.cursor = self._local.conn.cursor()
+        return self._local
+
+    @property
+    def conn(self):
+        return self._thread_state().conn
+
+    @property
+    def cursor(self):
+        return self._thread_state().cursor
+
+    def run_once(self, key, fn):
+        with self._setup_lock:
+            if key not in self._done:
+                fn()
+                self._done.add(key)
+
+    def close(self):
+        with self._lock:
+            conns, self._open = self._open, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+        with self._managers_lock:
+            if self._managers.get(self.path) is self:
+                del self._managers[self.path]
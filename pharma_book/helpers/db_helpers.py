@@ -3,21 +3,60 @@ import sqlite3
 import pandas as pd
 import hashlib
 
+from helpers.claim_pricing import ClaimPricing
+from helpers.connection_manager import ConnectionManager
+from helpers.frame_cache import FrameCache
+from helpers.header_registry import HeaderRegistry
+from helpers.inclusion_loader import InclusionLoader
+from helpers.reference_cache import ReferenceCache
+from helpers.report_registry import ReportRegistry
+
+# One-off steps for existing app.db files, applied in order and tracked in PRAGMA user_version.
+SCHEMA_MIGRATIONS = [
+    # 1: user_data gained date/bin/status indexes; collect stats so the planner uses them
+    ["ANALYZE user_data"],
+]
+
 class DatabaseHelper:
     def __init__(self, base_dir, inclusion_dir=None, default_aac=None, default_wac=None, default_pbm=None):
         self.base_dir = base_dir
         self.db_path = os.path.join(base_dir, "app.db")
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
-        self.cursor = self.conn.cursor()
+        self.connections = ConnectionManager.for_path(self.db_path)
         self.QUOTED_USER_TABLE = '"user_data"'
+        # Bumped on every user_data/report_files write so callers can key caches on it
+        self.data_version = 0
         # Inclusion file paths
         self.inclusion_dir = inclusion_dir or os.path.join(base_dir, "inclusion_lists")
         self.default_aac = default_aac or os.path.join(self.inclusion_dir, "inclusion_AAClist.xlsx")
         self.default_wac = default_wac or os.path.join(self.inclusion_dir, "inclusion_WACMckFullLoad.csv")
         self.default_pbm = default_pbm or os.path.join(self.inclusion_dir, "inclusion_PBMlist.xlsx")
+        # Parsed inclusion lists and claim files, next to inclusion_lists/
+        self.frame_cache = FrameCache(os.path.join(os.path.dirname(self.inclusion_dir), "inclusion_cache"))
+        self.loader = InclusionLoader(self.connections, self.frame_cache)
+        self.reference = ReferenceCache(self.connections)
+        self.pricing = ClaimPricing(self.connections, self.reference)
+        self.headers = HeaderRegistry(self.connections)
+        self.connections.run_once('schema', self.create_schema)
+        self.reports = ReportRegistry(self.connections, os.path.join(base_dir, "ReimbursementReports"))
+
+    @property
+    def conn(self):
+        # This thread's connection (see helpers/connection_manager.py)
+        return self.connections.conn
+
+    @property
+    def cursor(self):
+        return self.connections.cursor
+
+    def create_schema(self):
         self.ensure_tables()
         self.ensure_users_table()  # Ensure user table for authentication
+        self.migrate_schema()
+        self.loader.ensure_tables()
+        self.pricing.ensure_tables()
+        self.headers.ensure_tables()
+        self.pricing.reprice_missing()
+        self.pricing.ensure_rollup()
 
     def ensure_tables(self):
         # Main user data table
@@ -35,10 +74,14 @@ class DatabaseHelper:
                 status TEXT
             )
         """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_data_date ON user_data(date_dispensed)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_data_bin_date ON user_data(bin, date_dispensed)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_data_ndc ON user_data(drug_ndc)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_data_status ON user_data(status)")
         # PBM info table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS pbm_info (
-                bin TEXT,
+                bin TEXT PRIMARY KEY,
                 pbm_name TEXT,
                 email TEXT
             )
@@ -47,6 +90,9 @@ class DatabaseHelper:
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS baseline (
                 ndc TEXT PRIMARY KEY,
+                drug_name TEXT,
+                bg TEXT,
+                effective_date TEXT,
                 aac REAL
             )
         """)
@@ -85,6 +131,14 @@ class DatabaseHelper:
         """)
         self.conn.commit()
 
+    def migrate_schema(self):
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        for target, steps in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+            for sql in steps:
+                self.cursor.execute(sql)
+            self.cursor.execute(f"PRAGMA user_version = {target}")
+        self.conn.commit()
+
     # --- USER LOGIN SYSTEM ---
 
     def ensure_users_table(self):
@@ -116,57 +170,29 @@ class DatabaseHelper:
 
     # --- END USER LOGIN SYSTEM ---
 
-    def load_pbm(self):
-        if not os.path.exists(self.default_pbm):
-            return
-        dfp = pd.read_excel(self.default_pbm, dtype=str)
-        dfp.columns = dfp.columns.str.strip()
-        dfp['BIN']      = dfp['BIN'].astype(str).str.strip()
-        dfp['PBM NAME'] = dfp['PBM NAME'].astype(str).str.strip()
-        email_col = next((c for c in dfp.columns if 'email' in c.lower()), None)
-        dfp['email'] = dfp[email_col].astype(str).str.strip() if email_col else ''
-        dfp = dfp.rename(columns={'BIN':'bin','PBM NAME':'pbm_name'})
-        dfp[['bin','pbm_name','email']].to_sql("pbm_info", self.conn, if_exists="replace", index=False)
-
-    def load_baseline(self):
-        if not os.path.exists(self.default_aac):
-            return
-        dfb = pd.read_excel(self.default_aac, dtype=str)
-        dfb.columns = dfb.columns.str.strip().str.lower()
-        dfb['ndc'] = dfb['ndc'].astype(str).str.replace(r'\D+', '', regex=True)
-        dfb['aac'] = pd.to_numeric(dfb['aac'], errors='coerce').fillna(0.0)
-        dfb.to_sql("baseline", self.conn, if_exists="replace", index=False)
-
-    def load_alt_rates(self):
-        if not os.path.exists(self.default_wac):
-            return
-        dfw_raw = pd.read_csv(self.default_wac, dtype=str, engine='python', on_bad_lines='skip')
-        lc = {c.strip().lower(): c for c in dfw_raw.columns}
-        ndc_col = next((o for low,o in lc.items() if 'ndc' in low and 'date' not in low), None)
-        wac_col = next((o for low,o in lc.items() if 'wac' in low), None)
-        pkg_col = next((o for low,o in lc.items() if 'package size' in low), None)
-        mult_col= next((o for low,o in lc.items() if 'multiplier' in low), None)
-        generic_col = next((o for low,o in lc.items() if 'generic' in low and 'indicator' in low), None)
-
-        mapping = {}
-        if ndc_col:      mapping[ndc_col]        = 'ndc'
-        if wac_col:      mapping[wac_col]        = 'wac'
-        if pkg_col:      mapping[pkg_col]        = 'pkg_size'
-        if mult_col:     mapping[mult_col]       = 'pkg_size_mult'
-        if generic_col:  mapping[generic_col]    = 'generic_indicator'
-
-        dfw = dfw_raw.rename(columns=mapping)
-
-        for col in ('wac','pkg_size','pkg_size_mult'):
-            dfw[col] = pd.to_numeric(dfw.get(col, 0), errors='coerce').fillna(0.0)
-        dfw['ndc'] = dfw.get('ndc','').astype(str).str.replace(r'\D+', '', regex=True)
-
-        if 'generic_indicator' in dfw.columns:
-            dfw['generic_indicator'] = dfw['generic_indicator'].astype(str).str.strip()
-        else:
-            dfw['generic_indicator'] = ''
+    # --- INCLUSION LISTS ---
+    # Each loader is a no-op when its source file is unchanged since the last load;
+    # the in-memory reference cache is only dropped when a table actually changed.
+
+    def _load_reference(self, table, path, force):
+        result = self.loader.load(table, path, force=force)
+        if not result['skipped']:
+            self.reference.invalidate()
+            if self.pricing.reprice_keys(table, result['keys']):
+                self.mark_changed()
+        return result
+
+    def load_pbm(self, force=False):
+        return self._load_reference('pbm_info', self.default_pbm, force)
 
-        dfw.to_sql("alt_rates", self.conn, if_exists="replace", index=False)
+    def load_baseline(self, force=False):
+        return self._load_reference('baseline', self.default_aac, force)
+
+    def load_alt_rates(self, force=False):
+        return self._load_reference('alt_rates', self.default_wac, force)
+
+    def load_inclusion_lists(self, force=False):
+        return [self.load_pbm(force), self.load_baseline(force), self.load_alt_rates(force)]
 
     def get_profile(self):
         self.ensure_tables()
@@ -205,25 +231,76 @@ class DatabaseHelper:
         self.conn.commit()
 
     def insert_or_update_user_data(self, row):
-        existing = self.cursor.execute(
-            f"SELECT total_paid FROM {self.QUOTED_USER_TABLE} WHERE script=?", (row['script'],)
-        ).fetchone()
-        if existing is None:
+        self.upsert_user_data(pd.DataFrame([row]))
+
+    def upsert_user_data(self, df):
+        # Set-based equivalent of the per-row "SELECT total_paid, then INSERT or UPDATE"
+        # import: the first row of an unseen script is inserted, and every later row whose
+        # total_paid differs from the stored original updates the claim (last one wins)
+        # with its total_paid recorded as new_paid. Returns (inserted, updated).
+        cols = ['script', 'date_dispensed', 'drug_ndc', 'drug_name', 'qty', 'total_paid', 'bin']
+        with self.conn:
+            self.cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS user_data_stage (
+                    seq INTEGER PRIMARY KEY,
+                    script TEXT,
+                    date_dispensed TEXT,
+                    drug_ndc TEXT,
+                    drug_name TEXT,
+                    qty REAL,
+                    total_paid REAL,
+                    bin TEXT,
+                    first_new INTEGER DEFAULT 0
+                )
+            """)
+            self.cursor.execute("DELETE FROM user_data_stage")
+            self.cursor.executemany(
+                f"INSERT INTO user_data_stage ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                df[cols].itertuples(index=False, name=None)
+            )
+            self.cursor.execute(f"""
+                UPDATE user_data_stage SET first_new=1
+                WHERE seq IN (SELECT MIN(seq) FROM user_data_stage GROUP BY script)
+                  AND script NOT IN (SELECT script FROM {self.QUOTED_USER_TABLE})
+            """)
             self.cursor.execute(f"""
                 INSERT INTO {self.QUOTED_USER_TABLE}(script,date_dispensed,drug_ndc,drug_name,qty,total_paid,new_paid,bin)
-                VALUES(?,?,?,?,?,?,NULL,?)
-            """, (row['script'], row['date_dispensed'], row['drug_ndc'],
-                  row['drug_name'], row['qty'], row['total_paid'], row['bin']))
-        else:
-            orig = existing[0]
-            if row['total_paid'] != orig:
-                self.cursor.execute(f"""
-                    UPDATE {self.QUOTED_USER_TABLE}
-                    SET date_dispensed=?, drug_ndc=?, drug_name=?, qty=?, new_paid=?, bin=?
-                    WHERE script=?
-                """, (row['date_dispensed'], row['drug_ndc'], row['drug_name'],
-                      row['qty'], row['total_paid'], row['bin'], row['script']))
-        self.conn.commit()
+                SELECT script, date_dispensed, drug_ndc, drug_name, qty, total_paid, NULL, bin
+                FROM user_data_stage WHERE first_new=1
+                ON CONFLICT(script) DO NOTHING
+            """)
+            inserted = self.cursor.rowcount
+            updated = self.cursor.execute(f"""
+                SELECT COUNT(*) FROM user_data_stage s
+                JOIN {self.QUOTED_USER_TABLE} u ON u.script = s.script
+                WHERE s.first_new=0 AND s.total_paid IS NOT u.total_paid
+            """).fetchone()[0]
+            self.cursor.execute(f"""
+                INSERT INTO {self.QUOTED_USER_TABLE}(script,date_dispensed,drug_ndc,drug_name,qty,new_paid,bin)
+                SELECT s.script, s.date_dispensed, s.drug_ndc, s.drug_name, s.qty, s.total_paid, s.bin
+                FROM user_data_stage s
+                WHERE s.seq IN (
+                    SELECT MAX(s2.seq) FROM user_data_stage s2
+                    JOIN {self.QUOTED_USER_TABLE} u ON u.script = s2.script
+                    WHERE s2.first_new=0 AND s2.total_paid IS NOT u.total_paid
+                    GROUP BY s2.script
+                )
+                ON CONFLICT(script) DO UPDATE SET
+                    date_dispensed=excluded.date_dispensed, drug_ndc=excluded.drug_ndc,
+                    drug_name=excluded.drug_name, qty=excluded.qty,
+                    new_paid=excluded.new_paid, bin=excluded.bin
+                WHERE {self.QUOTED_USER_TABLE}.total_paid IS NOT excluded.new_paid
+            """)
+            if inserted or updated:
+                self.pricing.reprice("u.script IN (SELECT script FROM user_data_stage)")
+            self.cursor.execute("DELETE FROM user_data_stage")
+        if inserted or updated:
+            self.mark_changed()
+        return inserted, updated
+
+    def mark_changed(self):
+        self.data_version += 1
+        self.reports.invalidate()
 
     def update_user_status(self, script, status):
         self.cursor.execute(
@@ -231,6 +308,7 @@ class DatabaseHelper:
             (status, script)
         )
         self.conn.commit()
+        self.mark_changed()
 
     def get_report_file(self, script, report_type):
         self.cursor.execute(
@@ -250,6 +328,34 @@ class DatabaseHelper:
             (script, report_type, pdf_file)
         )
         self.conn.commit()
+        self.mark_changed()
+
+    def attach_report(self, scripts, report_type, pdf_file):
+        return self.attach_reports([(report_type, pdf_file, scripts)])
+
+    def attach_reports(self, reports):
+        # reports: [(report_type, pdf_file, scripts)]; every link written in one transaction
+        rows = [(script, report_type, pdf_file) for report_type, pdf_file, scripts in reports for script in scripts]
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO report_files (script, report_type, pdf_file)
+                VALUES (?, ?, ?)
+                ON CONFLICT(script, report_type) DO UPDATE SET pdf_file=excluded.pdf_file
+            """, rows)
+            self.conn.executemany(
+                f"UPDATE {self.QUOTED_USER_TABLE} SET pdf_file=? WHERE script=?",
+                [(pdf_file, script) for script, _, pdf_file in rows]
+            )
+        self.mark_changed()
+        return len(rows)
+
+    def mark_emailed(self, scripts):
+        with self.conn:
+            self.conn.executemany(
+                f"UPDATE {self.QUOTED_USER_TABLE} SET status='emailed PBM' WHERE script=?",
+                [(script,) for script in scripts]
+            )
+        self.mark_changed()
 
     def get_pbm_emails(self):
         df = pd.read_sql_query("SELECT pbm_name, email FROM pbm_info", self.conn)
@@ -268,6 +374,7 @@ class DatabaseHelper:
             (script, report_type)
         )
         self.conn.commit()
+        self.mark_changed()
 
     def fetch_user_data_between_dates(self, start_date, end_date):
         query = f"SELECT * FROM {self.QUOTED_USER_TABLE} WHERE date_dispensed BETWEEN ? AND ?"
@@ -279,5 +386,25 @@ class DatabaseHelper:
             sql += f" WHERE {where}"
         return pd.read_sql_query(sql, self.conn, params=params)
 
+    def read_for_scripts(self, sql, scripts, params=()):
+        """Run ``sql`` with ``{scripts}`` standing for a set of scripts; returns a DataFrame.
+
+        The set is loaded into a temp table instead of one ``?`` per script, so
+        views with more scripts than SQLite's host-parameter limit still work.
+        e.g. ``read_for_scripts("SELECT * FROM report_files WHERE script IN {scripts}", scripts)``
+        """
+        # Temp tables belong to the connection, and connections are per thread
+        conn = self.conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS script_set (script TEXT PRIMARY KEY)")
+        with conn:
+            conn.execute("DELETE FROM temp.script_set")
+            conn.executemany("INSERT OR IGNORE INTO temp.script_set VALUES (?)", [(s,) for s in scripts])
+        try:
+            sql = sql.replace("{scripts}", "(SELECT script FROM temp.script_set)")
+            return pd.read_sql_query(sql, conn, params=list(params))
+        finally:
+            with conn:
+                conn.execute("DELETE FROM temp.script_set")
+
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        self.connections.close()
\ No newline at end of file
@@ -1,16 +1,15 @@
 import os
-import webbrowser
-import urllib.parse
-import mimetypes
 from datetime import datetime
-from email.message import EmailMessage
-from email import policy
 
 class EmailHelper:
     def __init__(self, report_dir):
         self.REPORT_DIR = report_dir
 
     def create_eml_draft(self, to_email, subject, body, attachment_paths, output_path, from_email="Pharmacy Owedbook <noreply@example.com>"):
+        # The mail stack is only loaded when a draft is actually written
+        import mimetypes
+        from email.message import EmailMessage
+        from email import policy
         msg = EmailMessage(policy=policy.SMTP)
         msg["To"] = to_email
         msg["Subject"] = subject
@@ -73,6 +72,8 @@ class EmailHelper:
                 return
             except Exception:
                 # last fallback to mailto (no attachments)
+                import urllib.parse
+                import webbrowser
                 params = {"subject": subject, "body": body}
                 query = urllib.parse.urlencode(params, quote_via=urllib.parse.quote)
                 mailto = f"mailto:{urllib.parse.quote(to_email)}?{query}"
@@ -0,0 +1,108 @@
+import importlib.util
+import os
+
+import numpy as np
+
+# Artifacts are Feather (Arrow IPC) files; without pyarrow every lookup misses and nothing is stored
+ARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+# Part of every artifact name: bump it whenever what a parse produces changes (PARSERS, the
+# inclusion-list normalization, read_claims_file), so frames of an older release are never served
+CACHE_VERSION = 1
+
+
+class FrameCache:
+    """Parsed frames stored as Feather files, keyed by CACHE_VERSION and the SHA-256 of their source file.
+
+    ``cached()`` memory-maps the artifact of an unchanged source instead of parsing
+    it again; an edited source has a new hash and simply misses. Used for the
+    normalized inclusion lists (InclusionLoader) and, when claims_cache() opts
+    in, for raw claim files that are imported again (parse_claims_file). Only
+    the ``keep`` most recently used artifacts of each kind stay on disk.
+    """
+
+    def __init__(self, cache_dir, keep=4):
+        self.cache_dir = cache_dir
+        self.keep = keep
+
+    @property
+    def enabled(self):
+        return ARROW_AVAILABLE
+
+    def path(self, kind, digest):
+        return os.path.join(self.cache_dir, f"{kind}-v{CACHE_VERSION}-{digest}.feather")
+
+    def get(self, kind, digest):
+        path = self.path(kind, digest)
+        if not self.enabled or not os.path.exists(path):
+            return None
+        from pyarrow import feather
+        try:
+            df = feather.read_table(path, memory_map=True).to_pandas()
+        except Exception:
+            # Truncated or from an incompatible pyarrow: parse the source instead
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        # Arrow hands back missing strings as None; the parsers produced NaN
+        strings = df.columns[df.dtypes == object]
+        df[strings] = df[strings].where(df[strings].notna(), np.nan)
+        return df
+
+    def put(self, kind, digest, df):
+        if not self.enabled or not all(isinstance(c, str) for c in df.columns):
+            return
+        from pyarrow import feather
+        path = self.path(kind, digest)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            feather.write_feather(df.reset_index(drop=True), tmp)
+            os.replace(tmp, path)
+        except Exception:
+            # A cache that can't be written only costs the next parse
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._prune(kind)
+
+    def cached(self, kind, digest, parse, *args):
+        # parse(*args) on a miss, stored for next time unless it returned None
+        df = self.get(kind, digest)
+        if df is None:
+            df = parse(*args)
+            if df is not None:
+                self.put(kind, digest, df)
+        return df
+
+    def clear(self, kind):
+        # Delete every artifact of one kind
+        try:
+            names = [name for name in os.listdir(self.cache_dir) if name.startswith(f"{kind}-")]
+        except OSError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def _prune(self, kind):
+        current = f"{kind}-v{CACHE_VERSION}-"
+        try:
+            names = [name for name in os.listdir(self.cache_dir)
+                     if name.startswith(f"{kind}-") and name.endswith('.feather')]
+            paths = [os.path.join(self.cache_dir, name) for name in names if name.startswith(current)]
+            paths.sort(key=os.path.getmtime, reverse=True)
+        except OSError:
+            # Another process pruned at the same time
+            return
+        # Artifacts of other cache versions are never read again
+        stale = [os.path.join(self.cache_dir, name) for name in names if not name.startswith(current)]
+        for path in paths[self.keep:] + stale:
+            try:
+                os.remove(path)
+            except OSError:
+                # Still memory-mapped by another process (Windows)
+                pass
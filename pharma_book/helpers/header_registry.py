@@ -0,0 +1,57 @@
+import hashlib
+import json
+from datetime import datetime
+
+
+def header_signature(headers):
+    # Layout key of a claims export: hash of its sorted header names
+    return hashlib.sha256(json.dumps(sorted(str(h) for h in headers)).encode('utf-8')).hexdigest()
+
+
+class HeaderRegistry:
+    """Column mapping of every claims-export layout seen, in ``header_mappings``.
+
+    Keyed by ``header_signature``, so a known layout resolves with one lookup and
+    resolve_columns' fuzzy matching only runs for new ones. A mapping the user
+    confirmed or edited is pinned; recording an automatic mapping never replaces it.
+    """
+
+    def __init__(self, connections):
+        self.connections = connections
+
+    @property
+    def conn(self):
+        # The calling thread's connection
+        return self.connections.conn
+
+    def ensure_tables(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS header_mappings (
+                signature TEXT PRIMARY KEY,
+                headers TEXT,
+                mapping TEXT,
+                pinned INTEGER DEFAULT 0,
+                saved_at TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def mappings(self):
+        # {signature: (canonical column -> export header or None, pinned)}
+        return {
+            sig: (json.loads(mapping), bool(pinned))
+            for sig, mapping, pinned in self.conn.execute("SELECT signature, mapping, pinned FROM header_mappings")
+        }
+
+    def save(self, headers, mapping, pinned=False):
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO header_mappings (signature, headers, mapping, pinned, saved_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(signature) DO UPDATE SET
+                    headers=excluded.headers, mapping=excluded.mapping,
+                    pinned=excluded.pinned, saved_at=excluded.saved_at
+                WHERE excluded.pinned OR NOT header_mappings.pinned
+            """, (header_signature(headers), json.dumps(list(headers)), json.dumps(mapping), int(pinned),
+                  datetime.now().isoformat(timespec='seconds')))
+
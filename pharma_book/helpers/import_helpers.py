@@ -0,0 +1,452 @@
+import csv
+import io
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+from helpers.header_registry import header_signature
+from helpers.inclusion_loader import file_sha256
+
+# Claims export extensions the importer reads
+CLAIM_FILE_TYPES = (".xlsx", ".xls", ".xlsm", ".csv")
+REQUIRED_COLUMNS = ('script', 'total_paid', 'date_dispensed')
+# What a parsed file hands back to the writer (DatabaseHelper.upsert_user_data)
+IMPORT_COLUMNS = ['script', 'date_dispensed', 'drug_ndc', 'drug_name', 'qty', 'total_paid', 'bin']
+# CSV exports at least this big are streamed: read, normalized and written a chunk at a time
+STREAM_MIN_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK_ROWS = 100_000
+# Raw claim exports hold patient data: they are kept in the frame cache only when this is set
+CACHE_CLAIMS_ENV = 'PHARMABOOKS_CACHE_CLAIMS'
+
+
+class MissingColumns(ValueError):
+    def __init__(self, missing, headers):
+        super().__init__(f"missing required columns: {', '.join(missing)}")
+        self.missing = missing
+        self.headers = headers
+
+
+def clean_numeric(value):
+    if pd.isna(value):
+        return 0.0
+    s = str(value).strip()
+    if s == '':
+        return 0.0
+    negative = False
+    if s.startswith('(') and s.endswith(')'):
+        negative = True
+        s = s[1:-1]
+    s = re.sub(r'[^0-9.\-]', '', s)
+    try:
+        num = float(s)
+    except ValueError:
+        return 0.0
+    return -num if negative else num
+
+
+def normalize_date(val):
+    try:
+        dt = pd.to_datetime(val, errors='coerce')
+        if pd.isna(dt):
+            return ''
+        return dt.strftime('%Y-%m-%d')
+    except Exception:
+        return ''
+
+
+# Code points str.strip() removes
+WHITESPACE = np.array([ord(c) for c in map(chr, range(0x3001)) if c.isspace()], dtype=np.uint32)
+DIGIT_0, DIGIT_9, DOT, MINUS = (ord(c) for c in '09.-')
+
+
+def clean_numeric_column(values):
+    """clean_numeric over a whole column, with identical results.
+
+    Runs once per distinct value, on the values' code points as a 2-D array:
+    a value is negative when its first and last non-blank characters are '('
+    and ')'; everything but [0-9.-] is dropped (the parentheses with it); what
+    is left converts only if float() would accept it, otherwise it is 0.0.
+    """
+    codes, uniques = pd.factorize(values)
+    text = np.asarray(uniques, dtype=object).astype(str)
+    if not len(text) or not text.dtype.itemsize:
+        return pd.Series(0.0, index=values.index)
+    chars = text.view(np.uint32).reshape(len(text), -1)
+    blank = np.isin(chars, WHITESPACE) | (chars == 0)
+    first = np.argmax(~blank, axis=1)
+    last = chars.shape[1] - 1 - np.argmax(~blank[:, ::-1], axis=1)
+    rows = np.arange(len(text))
+    negative = (chars[rows, first] == ord('(')) & (chars[rows, last] == ord(')')) & (first < last)
+
+    keep = ((chars >= DIGIT_0) & (chars <= DIGIT_9)) | (chars == DOT) | (chars == MINUS)
+    kept = np.take_along_axis(np.where(keep, chars, 0), np.argsort(~keep, axis=1, kind='stable'), axis=1)
+    # float() accepts -?(digits[.digits]|.digits): a leading '-' only, at most one '.', some digit
+    minus = (kept == MINUS).sum(axis=1)
+    valid = (((minus == 0) | ((minus == 1) & (kept[:, 0] == MINUS)))
+             & ((kept == DOT).sum(axis=1) <= 1)
+             & ((kept >= DIGIT_0) & (kept <= DIGIT_9)).any(axis=1))
+
+    num = np.zeros(len(text))
+    num[valid] = np.ascontiguousarray(kept[valid]).view(text.dtype).ravel().astype(float)
+    num[valid & negative] *= -1
+    # Blanks/NaN (code -1) are 0.0, as in clean_numeric
+    return pd.Series(np.where(codes >= 0, num[codes], 0.0), index=values.index)
+
+
+def normalize_date_column(values):
+    """normalize_date over a whole column, with identical results.
+
+    Parsed once per distinct value. Values are grouped by the format pandas
+    guesses for each (what a per-cell to_datetime does), and every group is
+    parsed with one pd.to_datetime(format=...) call; values with no guessable
+    format, or a group pandas can't parse as one array, go through normalize_date.
+    """
+    codes, uniques = pd.factorize(values)
+    out = np.full(len(uniques), '', dtype=object)
+    formats = {}
+    for i, v in enumerate(uniques):
+        fmt = guess_datetime_format(v) if isinstance(v, str) else None
+        formats.setdefault(fmt, []).append(i)
+    for fmt, idx in formats.items():
+        if fmt is not None:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', FutureWarning)
+                    parsed = pd.to_datetime(pd.Index(uniques[idx], dtype=object), format=fmt, errors='coerce')
+            except (ValueError, TypeError):
+                parsed = None
+            # Mixed UTC offsets come back as an object Index of Timestamps
+            if isinstance(parsed, pd.DatetimeIndex):
+                out[idx] = parsed.strftime('%Y-%m-%d').fillna('')
+                continue
+        out[idx] = [normalize_date(uniques[i]) for i in idx]
+    result = np.where(codes >= 0, out[codes] if len(out) else '', normalize_date(np.nan))
+    return pd.Series(result, index=values.index, dtype=object)
+
+
+def resolve_columns(raw_cols):
+    import difflib
+    variants = {
+        'script': ['script', 'prescription id', 'rx number', 'rx', 'script id', 'rx#'],
+        'total_paid': ['total paid', 'total_paid', 'paid amount', 'amount paid', 'payment'],
+        'date_dispensed': ['date dispensed', 'dispense date', 'fill date', 'date of fill', 'date_filled'],
+        'drug_ndc': ['drug ndc', 'ndc', 'ndc code'],
+        'drug_name': ['drug name', 'medication', 'product name', 'drug'],
+        'qty': ['qty', 'quantity', 'quantity billed', 'amount dispensed', 'dispensed quantity'],
+        'bin': ['bin']
+    }
+    lc_to_orig = {c.strip().lower(): c for c in raw_cols}
+    keys = list(lc_to_orig)
+    resolved = {}
+    unmatched_required = []
+    for canonical, possibles in variants.items():
+        found = None
+        for p in possibles:
+            if p in lc_to_orig:
+                found = lc_to_orig[p]
+                break
+        if not found:
+            matches = difflib.get_close_matches(canonical, keys, n=1, cutoff=0.7)
+            if matches:
+                found = lc_to_orig[matches[0]]
+            else:
+                for p in possibles:
+                    matches = difflib.get_close_matches(p, keys, n=1, cutoff=0.7)
+                    if matches:
+                        found = lc_to_orig[matches[0]]
+                        break
+        if found:
+            resolved[canonical] = found
+        else:
+            if canonical in REQUIRED_COLUMNS:
+                unmatched_required.append(canonical)
+            else:
+                resolved[canonical] = None
+    return resolved, unmatched_required
+
+
+def read_claims_file(path):
+    # Raw export with every cell as a string; None for extensions the importer ignores
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return pd.read_excel(path, dtype=str, engine="openpyxl")
+    if ext == ".xls":
+        return pd.read_excel(path, dtype=str, engine="xlrd")
+    if ext == ".csv":
+        return pd.read_csv(path, dtype=str, engine="python", on_bad_lines='skip')
+    return None
+
+
+def streamed(path):
+    # Large CSVs are imported chunk by chunk (stream_claims_csv) instead of read whole
+    return os.path.splitext(path)[1].lower() == ".csv" and os.path.getsize(path) >= STREAM_MIN_BYTES
+
+
+def csv_record_blocks(path, width, rows):
+    """(UTF-8 bytes, clean) for a CSV export after its header record, about ``rows`` records at a time.
+
+    Records end where read_claims_file's python parser ends them: a line with no
+    quotes is a record of its own, anything else goes through the csv module,
+    strict as that parser runs it. Records with more fields than ``width`` are
+    left out, as that parser skips them, so a block can be read with ``usecols``.
+    ``clean`` is False for a block holding lines the csv module gave up on (an
+    unclosed quote, say).
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        lines, pending = [], []
+
+        def source():
+            # The line that started a quoted record, then as many more as it takes
+            while True:
+                line = pending.pop() if pending else next(f, '')
+                if not line:
+                    return
+                lines.append(line)
+                yield line
+
+        reader = csv.reader(source(), strict=True)
+        count, clean, header = 0, True, True
+        for line in f:
+            start = len(lines)
+            if '"' in line or '\0' in line:
+                pending.append(line)
+                try:
+                    fields = len(next(reader))
+                except csv.Error:
+                    clean, fields = False, 0
+            else:
+                lines.append(line)
+                fields = line.count(',') + 1
+            if header:
+                lines.clear()
+                clean, header = True, False
+                continue
+            if fields > width:
+                del lines[start:]
+                continue
+            count += 1
+            if count >= rows:
+                yield ''.join(lines).encode('utf-8'), clean
+                lines.clear()
+                count, clean = 0, True
+        if lines:
+            yield ''.join(lines).encode('utf-8'), clean
+
+
+def iter_claims_csv(path, columns, chunk_rows=STREAM_CHUNK_ROWS):
+    """Raw chunks of a CSV export holding only ``columns``, every cell a string.
+
+    Blocks from csv_record_blocks() hold no lines with more fields than the
+    header, empty or not, as read_claims_file's python parser drops them, and
+    go through the C parser with ``usecols``. A block with lines the csv module
+    gave up on, or that the C parser can't tokenize, is read with the python
+    parser instead, skipping what it skips in the whole file; the next block is
+    back on the C parser.
+    """
+    headers = list(pd.read_csv(path, dtype=str, nrows=0).columns)
+    kw = dict(dtype=str, header=None, names=headers, usecols=columns, on_bad_lines='skip')
+    for text, clean in csv_record_blocks(path, len(headers), chunk_rows):
+        chunk = None
+        if clean:
+            try:
+                chunk = pd.read_csv(io.BytesIO(text), **kw)
+            except pd.errors.ParserError:
+                pass
+        if chunk is None:
+            chunk = pd.read_csv(io.BytesIO(text), engine='python', **kw)
+        yield chunk[columns]
+
+
+def stream_claims_csv(path, mapping, chunk_rows=STREAM_CHUNK_ROWS):
+    # (normalized chunk, raw rows read) for each chunk of a streamed export
+    columns = list(dict.fromkeys(h for h in mapping.values() if h))
+    for chunk in iter_claims_csv(path, columns, chunk_rows):
+        yield normalize_claims(chunk, mapping)[0], len(chunk)
+
+
+def describe_mapping(resolved):
+    return ", ".join(f"{orig}→{canon}" for canon, orig in resolved.items() if orig)
+
+
+def claims_layout(columns, mappings=None):
+    # Header signature of an export and the mapping to read it with: the saved one if known
+    headers = [str(c) for c in columns]
+    signature = header_signature(headers)
+    known = (mappings or {}).get(signature)
+    mapping = known if known is not None else resolve_columns(columns)[0]
+    return {'signature': signature, 'headers': headers, 'mapping': mapping, 'known': known is not None}
+
+
+def normalize_claims(df, resolved=None):
+    """Map a raw claims export onto the user_data columns (IMPORT_COLUMNS).
+
+    ``resolved`` is a known mapping (canonical column -> export header) for this
+    layout; without one, resolve_columns() fuzzy-matches the headers.
+    Returns (df, applied) where ``applied`` describes the header mapping used;
+    raises MissingColumns when a required column can't be resolved.
+    """
+    if resolved is None:
+        resolved, missing_required = resolve_columns(df.columns)
+    else:
+        missing_required = [c for c in REQUIRED_COLUMNS if not resolved.get(c)]
+    if missing_required:
+        raise MissingColumns(missing_required, list(df.columns))
+    applied = describe_mapping(resolved)
+    # One column per canonical name (a header may feed two); unmapped optional ones are blank
+    df = pd.DataFrame({
+        canon: df[resolved[canon]] if resolved.get(canon) else pd.Series('', index=df.index, dtype=object)
+        for canon in IMPORT_COLUMNS
+    })
+    # A cell missing from a short line is blank, whether the parser filled it with None (python) or NaN (C)
+    text = ['script', 'drug_ndc', 'drug_name', 'bin']
+    df[text] = df[text].fillna('').astype(str)
+    df['script'] = df['script'].str.strip()
+    df['total_paid'] = clean_numeric_column(df['total_paid'])
+    df['qty'] = clean_numeric_column(df['qty'])
+    df['drug_ndc'] = df['drug_ndc'].str.replace(r'\D+', '', regex=True)
+    df['drug_name'] = df['drug_name'].str.strip()
+    df['bin'] = df['bin'].str.strip()
+    df['date_dispensed'] = normalize_date_column(df['date_dispensed'])
+    df = df[df['date_dispensed'] != '']
+    return df, applied
+
+
+def claims_cache(frame_cache):
+    # The cache for parse_claims_files: frame_cache if CACHE_CLAIMS_ENV opts in, else None
+    # (and the claim files cached before it was turned off are deleted)
+    if os.environ.get(CACHE_CLAIMS_ENV):
+        return frame_cache
+    frame_cache.clear('claims')
+    return None
+
+
+def parse_claims_file(path, mappings=None, cache=None):
+    """Read and normalize one claims export; runs in a pool process.
+
+    ``mappings`` holds the known mapping per header signature (HeaderRegistry).
+    With a FrameCache as ``cache``, a file imported before is read back from its
+    cached raw frame instead of being parsed again.
+    Returns ('parsed', (df, applied, layout)) with the IMPORT_COLUMNS,
+    ('streamed', (None, applied, layout)) for a CSV too big to read whole (only
+    its header is read; write_claims streams it), ('skipped', (missing, layout)),
+    or ('failed', message), also for an extension that isn't a claims export.
+    ``layout`` is {'signature', 'headers', 'mapping', 'known'}.
+    """
+    try:
+        if streamed(path):
+            layout = claims_layout(pd.read_csv(path, dtype=str, nrows=0).columns, mappings)
+            missing = [c for c in REQUIRED_COLUMNS if not layout['mapping'].get(c)]
+            if missing:
+                return 'skipped', (missing, layout)
+            return 'streamed', (None, describe_mapping(layout['mapping']), layout)
+        if cache is not None:
+            df = cache.cached('claims', file_sha256(path), read_claims_file, path)
+        else:
+            df = read_claims_file(path)
+    except Exception as e:
+        return 'failed', str(e)
+    if df is None:
+        return 'failed', 'unsupported file type'
+    layout = claims_layout(df.columns, mappings)
+    try:
+        df, applied = normalize_claims(df, layout['mapping'])
+    except MissingColumns as e:
+        return 'skipped', (e.missing, layout)
+    return 'parsed', (df.reset_index(drop=True), applied, layout)
+
+
+def parse_claims_files(paths, mappings=None, max_workers=None, check=None, on_file=None, cache=None):
+    """Parse several exports in a process pool; returns [(path, df, layout)] in file order.
+
+    ``df`` is None for a streamed file, which write_claims() reads as it writes.
+
+    ``on_file(kind, path, info)`` follows each file as it finishes (in completion
+    order) with parse_claims_file's result; ``check`` is called between files and
+    may raise to stop. Concatenated, the frames keep every row in file order, so
+    one upsert_user_data() call dedupes by script exactly as importing the files
+    one after another would. A single file is parsed in this process.
+    """
+    results = [None] * len(paths)
+
+    def done(i, result):
+        results[i] = result
+        if on_file:
+            on_file(result[0], paths[i], result[1])
+        if check:
+            check()
+
+    if len(paths) == 1:
+        done(0, parse_claims_file(paths[0], mappings, cache))
+    elif paths:
+        workers = min(len(paths), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(parse_claims_file, p, mappings, cache): i for i, p in enumerate(paths)}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # The worker itself died (e.g. out of memory on a huge workbook)
+                        result = ('failed', str(e))
+                    done(futures[future], result)
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    return [(p, r[1][0], r[1][2]) for p, r in zip(paths, results) if r[0] in ('parsed', 'streamed')]
+
+
+def write_claims(db, parsed, check=None, on_rows=None, on_file=None):
+    """Upsert parse_claims_files' result into user_data in file order; returns (inserted, updated).
+
+    Consecutive parsed frames are written by one upsert_user_data() call, in one
+    transaction. A streamed file is read, normalized and upserted a chunk at a
+    time, so memory stays flat however big it is; as upsert_user_data dedupes
+    against what is already stored, that leaves the same rows as one call over
+    the whole file. Each chunk commits on its own: ``check`` is called before
+    every chunk and may raise to stop, keeping what was written.
+    ``on_rows(path, rows)`` reports the rows read so far of a streamed file.
+    A streamed file that turns out to be unreadable past its header (a bad byte,
+    say) is reported as ``on_file('failed', path, message)``, like a file
+    parse_claims_file can't read; its chunks already written are kept and the
+    next file is written.
+    """
+    inserted = updated = 0
+    frames = []
+
+    def upsert(df):
+        nonlocal inserted, updated
+        i, u = db.upsert_user_data(df)
+        inserted += i
+        updated += u
+
+    for path, df, layout in parsed:
+        if df is not None:
+            frames.append(df)
+            continue
+        if frames:
+            upsert(pd.concat(frames, ignore_index=True))
+            frames = []
+        rows = 0
+        chunks = stream_claims_csv(path, layout['mapping'])
+        while True:
+            try:
+                chunk, read = next(chunks)
+            except StopIteration:
+                break
+            except Exception as e:
+                kept = f"its first {rows:,} rows were imported" if rows else "nothing from it was imported"
+                if on_file:
+                    on_file('failed', path, f"{e} ({kept})")
+                break
+            if check:
+                check()
+            upsert(chunk)
+            rows += read
+            if on_rows:
+                on_rows(path, rows)
+    if frames:
+        upsert(pd.concat(frames, ignore_index=True))
+    return inserted, updated
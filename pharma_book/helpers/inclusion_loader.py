@@ -0,0 +1,246 @@
+import os
+import hashlib
+import time
+from datetime import datetime
+import pandas as pd
+
+# Canonical layout of each reference table: (key column, ordered columns)
+REFERENCE_TABLES = {
+    'pbm_info': ('bin', ['bin', 'pbm_name', 'email']),
+    'baseline': ('ndc', ['ndc', 'drug_name', 'bg', 'effective_date', 'aac']),
+    'alt_rates': ('ndc', ['ndc', 'wac', 'pkg_size', 'pkg_size_mult', 'generic_indicator']),
+}
+
+# Columns written by the old pandas to_sql loaders, mapped onto the canonical names
+LEGACY_COLUMNS = {
+    'drug name': 'drug_name',
+    'effective date': 'effective_date',
+}
+
+HASH_CHUNK = 1024 * 1024
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_pbm(path):
+    dfp = pd.read_excel(path, dtype=str)
+    dfp.columns = dfp.columns.str.strip()
+    dfp['BIN']      = dfp['BIN'].astype(str).str.strip()
+    dfp['PBM NAME'] = dfp['PBM NAME'].astype(str).str.strip()
+    email_col = next((c for c in dfp.columns if 'email' in c.lower()), None)
+    dfp['email'] = dfp[email_col].astype(str).str.strip() if email_col else ''
+    dfp = dfp.rename(columns={'BIN':'bin','PBM NAME':'pbm_name'})
+    return dfp[['bin','pbm_name','email']]
+
+
+def parse_baseline(path):
+    dfb = pd.read_excel(path, dtype=str)
+    dfb.columns = dfb.columns.str.strip().str.lower().str.replace(' ', '_')
+    dfb['ndc'] = dfb['ndc'].astype(str).str.replace(r'\D+', '', regex=True)
+    dfb['aac'] = pd.to_numeric(dfb['aac'], errors='coerce').fillna(0.0)
+    for col in ('drug_name', 'bg', 'effective_date'):
+        if col not in dfb.columns:
+            dfb[col] = ''
+    return dfb[REFERENCE_TABLES['baseline'][1]]
+
+
+def parse_alt_rates(path):
+    dfw_raw = pd.read_csv(path, dtype=str, engine='python', on_bad_lines='skip')
+    lc = {c.strip().lower(): c for c in dfw_raw.columns}
+    ndc_col = next((o for low,o in lc.items() if 'ndc' in low and 'date' not in low), None)
+    wac_col = next((o for low,o in lc.items() if 'wac' in low), None)
+    pkg_col = next((o for low,o in lc.items() if 'package size' in low), None)
+    mult_col= next((o for low,o in lc.items() if 'multiplier' in low), None)
+    generic_col = next((o for low,o in lc.items() if 'generic' in low and 'indicator' in low), None)
+
+    mapping = {}
+    if ndc_col:      mapping[ndc_col]        = 'ndc'
+    if wac_col:      mapping[wac_col]        = 'wac'
+    if pkg_col:      mapping[pkg_col]        = 'pkg_size'
+    if mult_col:     mapping[mult_col]       = 'pkg_size_mult'
+    if generic_col:  mapping[generic_col]    = 'generic_indicator'
+
+    dfw = dfw_raw.rename(columns=mapping)
+
+    for col in ('wac','pkg_size','pkg_size_mult'):
+        dfw[col] = pd.to_numeric(dfw.get(col, 0), errors='coerce').fillna(0.0)
+    dfw['ndc'] = dfw.get('ndc','').astype(str).str.replace(r'\D+', '', regex=True)
+
+    if 'generic_indicator' in dfw.columns:
+        dfw['generic_indicator'] = dfw['generic_indicator'].astype(str).str.strip()
+    else:
+        dfw['generic_indicator'] = ''
+
+    return dfw[REFERENCE_TABLES['alt_rates'][1]]
+
+
+PARSERS = {
+    'pbm_info': parse_pbm,
+    'baseline': parse_baseline,
+    'alt_rates': parse_alt_rates,
+}
+
+
+class InclusionLoader:
+    """Loads the inclusion lists into their reference tables, skipping unchanged files.
+
+    Each source file's size, mtime and SHA-256 are recorded in ``inclusion_sources``.
+    A file whose size and mtime match is skipped without being read; a file whose
+    content hash matches is skipped without being parsed. Changed files are diffed
+    against the table by key and only the inserts, updates and deletes are applied,
+    inside one transaction. With a ``frame_cache``, a file that does need loading
+    but was parsed before (a forced reload, a new app.db) comes from its cached
+    frame instead of openpyxl.
+    """
+
+    def __init__(self, connections, frame_cache=None):
+        self.connections = connections
+        self.frame_cache = frame_cache
+
+    @property
+    def conn(self):
+        # The calling thread's connection
+        return self.connections.conn
+
+    def ensure_tables(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS inclusion_sources (
+                table_name TEXT PRIMARY KEY,
+                path TEXT,
+                size INTEGER,
+                mtime_ns INTEGER,
+                sha256 TEXT,
+                row_count INTEGER,
+                loaded_at TEXT
+            )
+        """)
+        for table in REFERENCE_TABLES:
+            self._ensure_keyed_table(table)
+        self.conn.commit()
+
+    def _create_table_sql(self, table, name=None):
+        key, cols = REFERENCE_TABLES[table]
+        defs = []
+        for c in cols:
+            ctype = 'REAL' if c in ('aac', 'wac', 'pkg_size', 'pkg_size_mult') else 'TEXT'
+            defs.append(f"{c} {ctype} PRIMARY KEY" if c == key else f"{c} {ctype}")
+        return f"CREATE TABLE IF NOT EXISTS {name or table} ({', '.join(defs)})"
+
+    def _ensure_keyed_table(self, table):
+        key, cols = REFERENCE_TABLES[table]
+        info = self.conn.execute(f"PRAGMA table_info({table})").fetchall()
+        if not info:
+            self.conn.execute(self._create_table_sql(table))
+            return
+        existing = {r[1]: r[5] for r in info}
+        if existing.get(key) and set(existing) == set(cols):
+            return
+        # Table was replaced by an older to_sql load (no PRIMARY KEY, source-shaped
+        # columns). Rebuild it in the canonical shape, keeping the rows already there.
+        tmp = f"{table}__rebuild"
+        self.conn.execute(f"DROP TABLE IF EXISTS {tmp}")
+        self.conn.execute(self._create_table_sql(table, tmp))
+        by_canonical = {LEGACY_COLUMNS.get(c.lower(), c.lower()): c for c in existing}
+        if key in by_canonical:
+            select = ", ".join(
+                f'"{by_canonical[c]}"' if c in by_canonical else "NULL" for c in cols
+            )
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {tmp} ({', '.join(cols)}) "
+                f"SELECT {select} FROM {table} WHERE \"{by_canonical[key]}\" IS NOT NULL"
+            )
+        self.conn.execute(f"DROP TABLE {table}")
+        self.conn.execute(f"ALTER TABLE {tmp} RENAME TO {table}")
+        self.conn.execute("DELETE FROM inclusion_sources WHERE table_name=?", (table,))
+
+    def load(self, table, path, force=False):
+        # result['source'] is how the file was taken: missing, unchanged, cache or parsed
+        start = time.perf_counter()
+        result = {'table': table, 'skipped': True, 'inserted': 0, 'updated': 0, 'deleted': 0, 'keys': [],
+                  'source': 'missing'}
+        if path and os.path.exists(path):
+            self._load(result, table, path, force)
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    def _load(self, result, table, path, force):
+        result['source'] = 'unchanged'
+        size, mtime_ns = file_fingerprint(path)
+        row = self.conn.execute(
+            "SELECT path, size, mtime_ns, sha256 FROM inclusion_sources WHERE table_name=?", (table,)
+        ).fetchone()
+        if not force and row and row[0] == path and row[1] == size and row[2] == mtime_ns:
+            return
+        digest = file_sha256(path)
+        if not force and row and row[3] == digest:
+            self._record(table, path, size, mtime_ns, digest, None)
+            self.conn.commit()
+            return
+        df = self.frame_cache.get(table, digest) if self.frame_cache else None
+        result['source'] = 'cache' if df is not None else 'parsed'
+        if df is None:
+            df = PARSERS[table](path)
+            if self.frame_cache:
+                self.frame_cache.put(table, digest, df)
+        with self.conn:
+            counts = self._apply_diff(table, df)
+            self._record(table, path, size, mtime_ns, digest, len(df))
+        result.update(counts, skipped=False)
+
+    def _record(self, table, path, size, mtime_ns, digest, row_count):
+        self.conn.execute("""
+            INSERT INTO inclusion_sources (table_name, path, size, mtime_ns, sha256, row_count, loaded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(table_name) DO UPDATE SET
+                path=excluded.path, size=excluded.size, mtime_ns=excluded.mtime_ns,
+                sha256=excluded.sha256,
+                row_count=COALESCE(excluded.row_count, inclusion_sources.row_count),
+                loaded_at=excluded.loaded_at
+        """, (table, path, size, mtime_ns, digest, row_count, datetime.now().isoformat(timespec='seconds')))
+
+    def _apply_diff(self, table, df_new):
+        key, cols = REFERENCE_TABLES[table]
+        df_new = df_new[df_new[key].astype(str) != ''].drop_duplicates(subset=key, keep='last')
+        df_old = pd.read_sql_query(f"SELECT {', '.join(cols)} FROM {table}", self.conn)
+
+        old_keys = set(df_old[key])
+        new_keys = set(df_new[key])
+        deleted = old_keys - new_keys
+
+        merged = df_new.merge(df_old, on=key, how='left', suffixes=('', '_old'), indicator=True)
+        is_new = merged['_merge'] == 'left_only'
+        changed = pd.Series(False, index=merged.index)
+        for c in cols:
+            if c == key:
+                continue
+            a, b = merged[c], merged[f"{c}_old"]
+            changed |= ~((a == b) | (a.isna() & b.isna()))
+        upserts = merged.loc[is_new | changed, cols]
+
+        if deleted:
+            self.conn.executemany(f"DELETE FROM {table} WHERE {key}=?", [(k,) for k in deleted])
+        if not upserts.empty:
+            updates = ", ".join(f"{c}=excluded.{c}" for c in cols if c != key)
+            self.conn.executemany(
+                f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)}) "
+                f"ON CONFLICT({key}) DO UPDATE SET {updates}",
+                upserts.astype(object).where(upserts.notna(), None).itertuples(index=False, name=None)
+            )
+        return {
+            'inserted': int(is_new.sum()),
+            'updated': int((changed & ~is_new).sum()),
+            'deleted': len(deleted),
+            # Every key whose row was added, changed or removed
+            'keys': sorted(deleted | set(upserts[key])),
+        }
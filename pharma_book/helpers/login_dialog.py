@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from concurrent.futures import Future
 
 class LoginDialog(tk.Toplevel):
     def __init__(self, master, db_helper, *args, **kwargs):
@@ -24,10 +25,25 @@ class LoginDialog(tk.Toplevel):
         ttk.Button(frm, text="Login", command=self.login).grid(row=2, column=0, pady=(10,0))
         ttk.Button(frm, text="Register", command=self.register).grid(row=2, column=1, pady=(10,0))
 
+    @property
+    def db(self):
+        # db_helper may be a Future while app.db is still opening in the background;
+        # None (after telling the user) if it couldn't be opened
+        if not isinstance(self.db_helper, Future):
+            return self.db_helper
+        try:
+            return self.db_helper.result()
+        except Exception as e:
+            messagebox.showerror("Database Error", f"Could not open the database:\n{e}", parent=self)
+            return None
+
     def login(self):
         username = self.username_var.get().strip()
         password = self.password_var.get()
-        if self.db_helper.validate_user(username, password):
+        db = self.db
+        if db is None:
+            return
+        if db.validate_user(username, password):
             self.result = username
             self.destroy()
         else:
@@ -39,7 +55,10 @@ class LoginDialog(tk.Toplevel):
         if not username or not password:
             messagebox.showwarning("Missing info", "Enter both username and password.")
             return
-        if self.db_helper.create_user(username, password):
+        db = self.db
+        if db is None:
+            return
+        if db.create_user(username, password):
             messagebox.showinfo("Registered", "User registered! You can now log in.")
         else:
             messagebox.showerror("Register Failed", "Username already exists.")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# Digits an NDC key can hold; the digit count is stored above them
+MAX_NDC_DIGITS = 17
+LENGTH_TAG = 10 ** MAX_NDC_DIGITS
+# Key of a value that isn't a digit string of at most MAX_NDC_DIGITS; never matches
+MISSING = -1
+
+
+def encode_ndc(ndc):
+    """int64 keys for normalized (digits-only) NDC strings.
+
+    The key is the number tagged with its digit count, so '00093015001' and
+    '93015001' stay different keys, as they were different strings. Anything
+    else (longer than MAX_NDC_DIGITS, or not ASCII digits) is MISSING. Works on
+    the strings' code points as a 2-D array, like clean_numeric_column.
+    """
+    text = np.asarray(ndc, dtype=object).astype(str)
+    if not len(text):
+        return np.empty(0, dtype=np.int64)
+    if not text.dtype.itemsize:
+        # Only empty strings
+        return np.zeros(len(text), dtype=np.int64)
+    chars = text.view(np.uint32).reshape(len(text), -1)
+    filled = chars != 0
+    lengths = filled.sum(axis=1)
+    digits = chars.astype(np.int64) - ord('0')
+    ok = (((digits >= 0) & (digits <= 9)) | ~filled).all(axis=1) & (lengths <= MAX_NDC_DIGITS)
+    values = np.zeros(len(text), dtype=np.int64)
+    for column, present in zip(digits[:, :MAX_NDC_DIGITS].T, filled[:, :MAX_NDC_DIGITS].T):
+        values = np.where(present, values * 10 + column, values)
+    return np.where(ok, values + lengths * LENGTH_TAG, MISSING)
+
+
+class NdcPriceIndex:
+    """Reference prices by NDC: sorted int64 keys with parallel arrays.
+
+    ``aac`` comes from baseline; ``wac``, ``pkg_size`` and ``pkg_size_mult`` from
+    alt_rates (NaN where an NDC is in only one of them). ``brand`` is the generic
+    flag, generic_indicator 'N'. ``lookup()`` finds a column of claim NDCs with
+    one np.searchsorted over their distinct keys. Built by ReferenceCache
+    whenever baseline/alt_rates have reloaded.
+    """
+
+    FIELDS = ('aac', 'wac', 'pkg_size', 'pkg_size_mult')
+
+    def __init__(self, keys, aac, wac, pkg_size, pkg_size_mult, brand):
+        order = np.argsort(keys, kind='stable')
+        self.keys = np.asarray(keys, dtype=np.int64)[order]
+        # One extra slot past the end is what a miss reads: NaN prices, not a brand
+        self.columns = {
+            name: np.append(np.asarray(values, dtype=float)[order], np.nan)
+            for name, values in zip(self.FIELDS, (aac, wac, pkg_size, pkg_size_mult))
+        }
+        self.brand = np.append(np.asarray(brand, dtype=bool)[order], False)
+
+    @classmethod
+    def from_rates(cls, rates):
+        # ``rates``: ReferenceCache's baseline/alt_rates join, indexed by normalized NDC
+        keys = encode_ndc(rates.index)
+        rates = rates[keys != MISSING]
+        keys = keys[keys != MISSING]
+        brand = rates['generic_indicator'].astype(str).str.strip().str.upper() == 'N'
+        return cls(keys, *(rates[c].to_numpy(dtype=float) for c in cls.FIELDS), brand.to_numpy())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rows(self, ndc):
+        # Position of each NDC in the arrays; len(self) for a miss
+        codes, uniques = pd.factorize(np.asarray(ndc, dtype=object))
+        keys = encode_ndc(uniques)
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+        found &= keys != MISSING
+        found_rows = np.append(np.where(found, pos, len(self.keys)), len(self.keys))
+        # NaN NDCs (code -1) read the trailing miss slot
+        return found_rows[codes]
+
+    def lookup(self, ndc, index=None):
+        # aac, wac, pkg_size, pkg_size_mult and brand for each NDC, NaN/False where unknown
+        rows = self.rows(ndc)
+        data = {name: values[rows] for name, values in self.columns.items()}
+        data['brand'] = self.brand[rows]
+        return pd.DataFrame(data, index=index)
@@ -1,23 +1,97 @@
 from reportlab.lib.pagesizes import letter, landscape
+from reportlab.pdfbase.pdfmetrics import getFont
 from reportlab.pdfgen import canvas
 import os
-import pandas as pd
+import numpy as np
+from safe_filename import safe_filename
+
+# Report type (dashboard tab) -> output folder under ReimbursementReports/
+REPORT_FOLDERS = {
+    'Commercial Dollars': 'report_commercialdollars',
+    'Updated Commercial Payments': 'report_updatedcommercialdollars',
+    'Federal Dollars': 'report_federaldollars',
+    'Summary': 'report_summary',
+}
+PAGE_SIZE = landscape(letter)
+MARGIN = 40
+ROW_HEIGHT = 16
+HEADERS = ["Date","Script","Qty","AAC","Expected","Original Paid","Owed","Report"]
+XS = [MARGIN,110,260,320,380,460,540,620]
+# (source column, x, right edge offset or None for left-aligned) per body cell
+CELLS = [
+    ('date', XS[0], None),
+    ('script', XS[1], None),
+    ('qty', XS[2], 30),
+    ('aac', XS[3], 40),
+    ('expected_paid', XS[4], 50),
+    ('total_paid', XS[5], 50),
+    ('difference', XS[6], 30),
+]
+
+
+def _money(values):
+    return np.char.mod('%.2f', values.to_numpy(dtype=float))
+
+
+def text_widths(strings, font="Helvetica", size=9):
+    # stringWidth for a whole column: per-byte glyph widths summed across each string
+    widths = np.array(getFont(font).widths, dtype=float)
+    widths[0] = 0.0
+    encoded = np.asarray(strings).astype('S')
+    if not encoded.dtype.itemsize:
+        return np.zeros(len(encoded))
+    codes = encoded.view(np.uint8).reshape(len(encoded), encoded.dtype.itemsize)
+    return widths[codes].sum(axis=1) * size / 1000
+
+
+def format_rows(df):
+    # Every cell as its display string, one vectorized pass per column
+    return {
+        'date': df['date_dispensed'].dt.strftime('%Y-%m-%d').fillna('').to_numpy(),
+        'script': df['script'].astype(str).to_numpy(),
+        'qty': df['qty'].fillna(0).astype(int).astype(str).to_numpy(),
+        'aac': _money(df['aac']),
+        'expected_paid': _money(df['expected_paid']),
+        'total_paid': _money(df['total_paid']),
+        'difference': _money(df['difference']),
+    }
+
+
+def cell_positions(cells):
+    # x of every cell; right-aligned columns end at x + offset
+    return {col: np.full(len(cells[col]), float(x)) if right is None else x + right - text_widths(cells[col])
+            for col, x, right in CELLS}
+
 
 class PDFHelper:
     def __init__(self, report_dir):
         self.REPORT_DIR = report_dir
 
-    def save_pdf(self, df_export, folder, pbm, start, end, email=None):
-        os.makedirs(self.REPORT_DIR, exist_ok=True)
-        outdir = os.path.join(self.REPORT_DIR, folder)
-        os.makedirs(outdir, exist_ok=True)
+    @staticmethod
+    def rows_per_page(email=None):
+        top = PAGE_SIZE[1] - MARGIN - 24 - (20 if email else 0) - ROW_HEIGHT
+        return int((top - MARGIN) // ROW_HEIGHT) + 1
 
-        fn = f"{folder}_{pbm}_{start}_{end}.pdf".replace(" ", "_")
-        path = os.path.join(outdir, fn)
+    def _paginate(self, df_export, email, subtotals):
+        # Lines are row indexes, or ('subtotal', label, amount) footers after each PBM's rows
+        if subtotals and 'pbm_name' in df_export.columns and not df_export.empty:
+            lines = []
+            pbm_names = df_export['pbm_name'].to_numpy()
+            diffs = df_export['difference'].to_numpy(dtype=float)
+            breaks = np.flatnonzero(pbm_names[1:] != pbm_names[:-1]) + 1
+            for lo, hi in zip(np.r_[0, breaks], np.r_[breaks, len(df_export)]):
+                lines.extend(range(lo, hi))
+                lines.append(('subtotal', pbm_names[lo], diffs[lo:hi].sum()))
+        else:
+            lines = range(len(df_export))
+        per_page = self.rows_per_page(email)
+        return [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
 
-        c = canvas.Canvas(path, pagesize=landscape(letter))
-        w, h, m = landscape(letter)[0], landscape(letter)[1], 40
-        y = h - m
+    def _page_template(self, c, pbm, email):
+        # Title, email and column header drawn once and placed on every page as a form
+        w, h = PAGE_SIZE
+        y = h - MARGIN
+        c.beginForm('page_header')
         c.setFont("Helvetica-Bold",16)
         c.drawCentredString(w/2, y, pbm)
         y -= 24
@@ -25,40 +99,67 @@ class PDFHelper:
             c.setFont("Helvetica",10)
             c.drawCentredString(w/2, y, email)
             y -= 20
-
-        headers = ["Date","Script","Qty","AAC","Expected","Original Paid","Owed","Report"]
-        xs = [m,110,260,320,380,460,540,620]
         c.setFont("Helvetica-Bold",10)
-        for x,hdr in zip(xs,headers):
+        for x,hdr in zip(XS,HEADERS):
             c.drawString(x,y,hdr)
-        y -= 16
-        c.setFont("Helvetica",9)
-
-        for _, r in df_export.iterrows():
-            if y < m:
-                c.showPage(); y = h - m
-                c.setFont("Helvetica-Bold",16)
-                c.drawCentredString(w/2, y, pbm)
-                y -= 24
-                if email:
-                    c.setFont("Helvetica",10)
-                    c.drawCentredString(w/2, y, email)
-                    y -= 20
-                c.setFont("Helvetica-Bold",10)
-                for x,hdr in zip(xs,headers):
-                    c.drawString(x,y,hdr)
-                y -= 16
-                c.setFont("Helvetica",9)
-
-            c.drawString(xs[0], y, r['date_dispensed'].strftime('%Y-%m-%d') if pd.notna(r['date_dispensed']) else "")
-            c.drawString(xs[1], y, r['script'])
-            c.drawRightString(xs[2]+30, y, str(int(r['qty']) if pd.notna(r['qty']) else 0))
-            c.drawRightString(xs[3]+40, y, f"{r['aac']:.2f}")
-            c.drawRightString(xs[4]+50, y, f"{r['expected_paid']:.2f}")
-            c.drawRightString(xs[5]+50, y, f"{r['total_paid']:.2f}")
-            c.drawRightString(xs[6]+30, y, f"{r['difference']:.2f}")
-            c.drawString(xs[7], y, '')
-            y -= 16
+        c.endForm()
+        return y - ROW_HEIGHT
+
+    def save_pdf(self, df_export, folder, pbm, start, end, email=None, subtotals=False):
+        os.makedirs(self.REPORT_DIR, exist_ok=True)
+        outdir = os.path.join(self.REPORT_DIR, folder)
+        os.makedirs(outdir, exist_ok=True)
+
+        name = safe_filename(f"{folder}_{pbm}_{start}_{end}").replace(" ", "_")
+        # An earlier report of this PBM and period holds other scripts: number the new one.
+        # The name is reserved by creating the file, so parallel renders (or PBM names that
+        # only differ in spaces) never share one
+        path, n = os.path.join(outdir, f"{name}.pdf"), 2
+        while True:
+            try:
+                open(path, 'xb').close()
+                break
+            except FileExistsError:
+                path, n = os.path.join(outdir, f"{name}_{n}.pdf"), n + 1
+        try:
+            return self.render(df_export, path, pbm, email, subtotals)
+        except BaseException:
+            os.remove(path)
+            raise
+
+    def render(self, df_export, path, title, email=None, subtotals=False):
+        # Draw the report to ``path``; ``title`` heads every page
+        df_export = df_export.reset_index(drop=True)
+        cells = format_rows(df_export)
+        xs = cell_positions(cells)
+        pages = self._paginate(df_export, email, subtotals)
 
+        # Written to a temp file and moved into place, so a failed run never leaves a partial report
+        tmp = path + '.part'
+        c = canvas.Canvas(tmp, pagesize=PAGE_SIZE)
+        y0 = self._page_template(c, title, email)
+        for page in pages:
+            c.doForm('page_header')
+            text = c.beginText()
+            text.setFont("Helvetica",9)
+            y = y0
+            for line in page:
+                if isinstance(line, tuple):
+                    _, label, amount = line
+                    text.setFont("Helvetica-Bold",9)
+                    text.setTextOrigin(XS[4], y)
+                    text.textOut(f"Subtotal {label}")
+                    total = f"{amount:.2f}"
+                    text.setTextOrigin(XS[6]+30 - text_widths([total], "Helvetica-Bold")[0], y)
+                    text.textOut(total)
+                    text.setFont("Helvetica",9)
+                else:
+                    for col, _, _ in CELLS:
+                        text.setTextOrigin(xs[col][line], y)
+                        text.textOut(cells[col][line])
+                y -= ROW_HEIGHT
+            c.drawText(text)
+            c.showPage()
         c.save()
-        return path
\ No newline at end of file
+        os.replace(tmp, path)
+        return path
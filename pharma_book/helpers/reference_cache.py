@@ -0,0 +1,78 @@
+import threading
+import pandas as pd
+from helpers.ndc_index import NdcPriceIndex
+
+
+def normalize_ndc(series):
+    return series.astype(str).str.replace(r'\D+', '', regex=True)
+
+
+class ReferenceCache:
+    """In-memory copy of baseline, alt_rates and pbm_info, normalized and keyed for joins.
+
+    Built lazily on first use and kept until ``invalidate()`` is called, which
+    DatabaseHelper does whenever an inclusion list is actually reloaded. Claims
+    are priced through ``prices``, an NdcPriceIndex of the baseline/alt_rates join.
+    ``version`` increases on every invalidation so callers can key derived caches on it.
+    """
+
+    def __init__(self, connections):
+        self.connections = connections
+        self.version = 0
+        self._lock = threading.Lock()
+        self._rates = None
+        self._prices = None
+        self._pbm = None
+
+    @property
+    def conn(self):
+        # The calling thread's connection
+        return self.connections.conn
+
+    def invalidate(self):
+        with self._lock:
+            self._rates = None
+            self._prices = None
+            self._pbm = None
+            self.version += 1
+
+    def _build(self):
+        df_bas = pd.read_sql_query("SELECT ndc,aac FROM baseline", self.conn)
+        df_alt = pd.read_sql_query("SELECT ndc,wac,pkg_size,pkg_size_mult,generic_indicator FROM alt_rates", self.conn)
+        df_pbm = pd.read_sql_query("SELECT bin,pbm_name,email FROM pbm_info", self.conn)
+        df_bas['ndc'] = normalize_ndc(df_bas['ndc'])
+        df_alt['ndc'] = normalize_ndc(df_alt['ndc'])
+        df_bas = df_bas.drop_duplicates('ndc').set_index('ndc')
+        df_alt = df_alt.drop_duplicates('ndc').set_index('ndc')
+        self._rates = df_bas.join(df_alt, how='outer')
+        self._prices = NdcPriceIndex.from_rates(self._rates)
+        self._pbm = df_pbm.drop_duplicates('bin').set_index('bin')
+
+    def _current(self):
+        with self._lock:
+            if self._rates is None:
+                self._build()
+            return self._rates, self._prices, self._pbm
+
+    def frames(self):
+        rates, _, pbm = self._current()
+        return rates, pbm
+
+    @property
+    def rates(self):
+        return self._current()[0]
+
+    @property
+    def prices(self):
+        return self._current()[1]
+
+    @property
+    def pbm_info(self):
+        return self._current()[2]
+
+    def join(self, df_claims):
+        # df_claims must carry a normalized 'ndc' column and the raw 'bin'; the rates
+        # come from the NDC index (aac, wac, pkg_size, pkg_size_mult, brand)
+        _, prices, pbm = self._current()
+        rates = prices.lookup(df_claims['ndc'], index=df_claims.index)
+        return pd.concat([df_claims, rates], axis=1).join(pbm, on='bin')
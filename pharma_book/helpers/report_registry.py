@@ -0,0 +1,138 @@
+import os
+import threading
+import pandas as pd
+
+REPORT_COLUMNS = {
+    'Commercial Dollars': 'pdf_commercial',
+    'Updated Commercial Payments': 'pdf_updated',
+    'Federal Dollars': 'pdf_federal',
+    'Summary': 'pdf_summary',
+}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class ReportRegistry:
+    """In-memory view of ReimbursementReports/ and the report_files table.
+
+    The report dir and each of its folders are listed once with ``os.scandir``
+    and only listed again when their mtime changes (a file was added, removed
+    or renamed in them), so a refresh costs one ``stat`` per folder instead of
+    one per report row. report_files is read once and kept until ``invalidate()``.
+    A report is only an orphan when its folder could be listed: a missing or
+    unreadable report dir (an unmounted share, say) hides PDFs but drops nothing.
+    """
+
+    def __init__(self, connections, report_dir):
+        self.connections = connections
+        self.report_dir = report_dir
+        self._lock = threading.Lock()
+        # folder relative to report_dir ('' for the dir itself) -> (mtime_ns, file names);
+        # (None, None) for a folder that couldn't be listed, tried again on the next sync
+        self._folders = {}
+        self._rows = None
+        self._state = None   # (pdf columns by script, orphaned (script, report_type) pairs)
+
+    @property
+    def conn(self):
+        # The calling thread's connection
+        return self.connections.conn
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = None
+            self._state = None
+
+    def _list(self, folder, mtime):
+        # ((mtime_ns, file names), subfolders) of one folder
+        files, dirs = set(), []
+        try:
+            with os.scandir(os.path.join(self.report_dir, folder)) as it:
+                for entry in it:
+                    if entry.is_file():
+                        files.add(entry.name)
+                    elif entry.is_dir() and not folder:
+                        dirs.append(entry.name)
+        except OSError:
+            return (None, None), []
+        return (mtime, files), dirs
+
+    def _sync_files(self):
+        # Returns True when any folder listing changed since the last call
+        top = _mtime(self.report_dir)
+        if top is None:
+            changed = bool(self._folders)
+            self._folders = {}
+            return changed
+        changed = False
+        if self._folders.get('', (None,))[0] != top:
+            listing, dirs = self._list('', top)
+            # Keep listings of folders that are still there; new ones get listed below
+            self._folders = {'': listing, **{d: self._folders.get(d, (None, None)) for d in dirs}}
+            changed = True
+        for folder in [f for f in self._folders if f]:
+            mtime = _mtime(os.path.join(self.report_dir, folder))
+            if mtime is None:
+                del self._folders[folder]
+                changed = True
+            elif self._folders[folder][0] != mtime:
+                self._folders[folder] = self._list(folder, mtime)[0]
+                changed = True
+        return changed
+
+    def exists(self, rel):
+        folder, name = os.path.split(os.path.normpath(rel))
+        entry = self._folders.get(folder)
+        return bool(entry) and entry[1] is not None and name in entry[1]
+
+    def listed(self, rel):
+        # Whether rel's folder is known: listed, or absent from a listed report dir
+        if self._folders.get('', (None, None))[1] is None:
+            return False
+        folder = os.path.split(os.path.normpath(rel))[0]
+        return self._folders.get(folder, (None, ()))[1] is not None
+
+    def _build(self):
+        if self._rows is None:
+            self._rows = pd.read_sql_query("SELECT script, report_type, pdf_file FROM report_files", self.conn)
+        rows = self._rows
+        rel = rows['pdf_file'].fillna('')
+        missing = (rel != '') & ~rel.map(lambda r: self.exists(r) if r else True)
+        gone = missing & rel.map(lambda r: self.listed(r) if r else False)
+        orphans = list(zip(rows.loc[gone, 'script'], rows.loc[gone, 'report_type']))
+        present = rows[~missing]
+        columns = (present.pivot(index='script', columns='report_type', values='pdf_file')
+                   .rename(columns=REPORT_COLUMNS)
+                   .reindex(columns=list(REPORT_COLUMNS.values())).fillna(''))
+        columns.columns.name = None
+        return columns, orphans
+
+    def snapshot(self):
+        """Return (pdf columns indexed by script, orphaned (script, report_type) pairs).
+
+        Orphans are rows whose PDF no longer exists on disk; they are already
+        left out of the columns and can be dropped with ``drop()``. Rows in a
+        folder that couldn't be listed are left out too, but aren't orphans.
+        """
+        with self._lock:
+            if self._sync_files() or self._state is None:
+                self._state = self._build()
+            return self._state
+
+    def drop(self, orphans):
+        # Forget reports whose file is gone and clear the scripts' status, in one transaction
+        if not orphans:
+            return 0
+        with self.conn:
+            self.conn.executemany("DELETE FROM report_files WHERE script=? AND report_type=?", orphans)
+            self.conn.executemany(
+                'UPDATE "user_data" SET status=\'\' WHERE script=?',
+                [(script,) for script in {s for s, _ in orphans}]
+            )
+        self.invalidate()
+        return len(orphans)
@@ -0,0 +1,69 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+# Set (to anything) to print the startup timeline to stderr once the dashboard is up
+REPORT_ENV = 'PHARMABOOKS_STARTUP_REPORT'
+
+
+class StartupTimer:
+    """Milestones of a launch, in ms since this timer was created.
+
+    ``warm_up()`` runs the app's loader on a background thread while the login
+    dialog is up; ``timed_import()`` records how long each deferred module took,
+    so a module that creeps back onto the startup path shows up in ``report()``.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.marks = []
+        self._lock = threading.Lock()
+
+    def _add(self, label, at, took=None):
+        with self._lock:
+            self.marks.append((at, took, label, threading.current_thread().name))
+
+    def mark(self, label):
+        self._add(label, (time.perf_counter() - self.t0) * 1000)
+
+    def took(self, label, seconds):
+        # A step timed by its own code, ending now
+        self._add(label, (time.perf_counter() - self.t0) * 1000, seconds * 1000)
+
+    def timed_import(self, name):
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.took(f"import {name}", time.perf_counter() - start)
+        return module
+
+    def warm_up(self, fn, *args):
+        # Runs fn(*args) on a daemon thread; the Future holds its result or exception
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            self.mark(f"{fn.__name__} done")
+
+        threading.Thread(target=run, name=fn.__name__, daemon=True).start()
+        return future
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        with self._lock:
+            marks = sorted(self.marks)
+        print("startup:   at ms |  took ms | thread       | step", file=file)
+        for at, took, label, thread in marks:
+            took = f"{took:8.1f}" if took is not None else " " * 8
+            print(f"startup: {at:7.1f} | {took} | {thread[:12]:<12} | {label}", file=file)
+
+    def report_if_requested(self):
+        if os.environ.get(REPORT_ENV):
+            self.report()
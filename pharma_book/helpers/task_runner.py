@@ -0,0 +1,122 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    """Handle passed to a background job: progress reporting and cancellation checks."""
+
+    def __init__(self, runner, key=None, on_progress=None):
+        self.runner = runner
+        self.key = key
+        self.on_progress = on_progress
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def progress(self, *args):
+        if self.on_progress:
+            self.runner._post(self, self.on_progress, args)
+
+
+class TaskRunner:
+    """Runs jobs on a thread pool and delivers their callbacks on the Tk thread.
+
+    Jobs are called as ``fn(task, *args)`` and must not touch widgets. ``on_done``,
+    ``on_error``, ``on_cancel`` and ``on_progress`` are queued and run from a
+    ``master.after`` poll while jobs are outstanding. Submitting with a ``key``
+    cancels the previous job with that key, so only the latest one is delivered.
+    """
+
+    def __init__(self, master, max_workers=2, poll_ms=50):
+        self.master = master
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='owedbook')
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._latest = {}
+        self._poll_job = None
+
+    @property
+    def busy(self):
+        return bool(self._pending)
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, on_cancel=None, on_progress=None):
+        task = Task(self, key, on_progress)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous:
+                previous.cancel()
+            self._latest[key] = task
+        self._pending.add(task)
+        self.executor.submit(self._run, task, fn, args, on_done, on_error, on_cancel)
+        if self._poll_job is None:
+            self._poll_job = self.master.after(self.poll_ms, self._poll)
+        return task
+
+    def cancel(self, key):
+        task = self._latest.get(key)
+        if task:
+            task.cancel()
+
+    def cancel_all(self):
+        for task in list(self._pending):
+            task.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._poll_job is not None:
+            self.master.after_cancel(self._poll_job)
+            self._poll_job = None
+
+    def _post(self, task, callback, args=(), always=False, fallback=None):
+        # Callbacks of a cancelled task are dropped, or replaced by ``fallback``
+        self._queue.put((task, callback, args, always, fallback))
+
+    def _run(self, task, fn, args, on_done, on_error, on_cancel):
+        try:
+            task.check()
+            result = fn(task, *args)
+            task.check()
+        except TaskCancelled:
+            self._post(task, on_cancel, always=True)
+        except Exception as e:
+            self._post(task, on_error, (e,), fallback=on_cancel)
+        else:
+            self._post(task, on_done, (result,), fallback=on_cancel)
+        finally:
+            self._post(task, self._finish, (task,), always=True)
+
+    def _finish(self, task):
+        self._pending.discard(task)
+        if self._latest.get(task.key) is task:
+            del self._latest[task.key]
+
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                task, callback, args, always, fallback = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if always or not task.cancelled:
+                if callback:
+                    callback(*args)
+            elif fallback:
+                fallback()
+        if self._pending:
+            self._poll_job = self.master.after(self.poll_ms, self._poll)
@@ -0,0 +1,127 @@
+from tkinter import ttk
+import numpy as np
+import pandas as pd
+
+HEADER_HEIGHT = 24
+DEFAULT_ROW_HEIGHT = 20
+
+
+# --- Column formatters: each takes the visible slice of a column and returns display strings ---
+
+def fmt_text(s):
+    return ['' if pd.isna(v) else v for v in s]
+
+def fmt_date(s):
+    return [v.strftime('%Y-%m-%d') if pd.notna(v) else '' for v in s]
+
+def fmt_int(s):
+    return [int(v) if pd.notna(v) else 0 for v in s]
+
+def fmt_money(s):
+    return [f"{v:.2f}" for v in s]
+
+# Formatter names usable in a column spec instead of the function
+FORMATTERS = {'text': fmt_text, 'date': fmt_date, 'int': fmt_int, 'money': fmt_money}
+
+
+class VirtualGrid(ttk.Frame):
+    """Treeview that only holds the rows currently scrolled into view.
+
+    ``columns`` is a list of (name, heading, source column, formatter), the formatter
+    given as a function or a FORMATTERS name. The backing DataFrame keeps its native
+    dtypes; only the visible window is formatted, each time it is drawn, so setting
+    or scrolling 100k rows costs the same as 40.
+    """
+
+    def __init__(self, master, columns, col_width=80, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = [(name, heading, src, FORMATTERS.get(fmt, fmt)) for name, heading, src, fmt in columns]
+        self.names = [c[0] for c in columns]
+        self.df = pd.DataFrame()
+        self.order = np.arange(0)
+        self.offset = 0
+        self.visible = 1
+        self.sort_state = {}
+        self._sort_cache = {}
+        self.tree = ttk.Treeview(self, columns=self.names, show='headings', style="Treeview")
+        for name, heading, _, _ in columns:
+            self.tree.heading(name, text=heading, command=lambda c=name: self.sort_by(c))
+            self.tree.column(name, width=col_width, anchor='center')
+        self.vsb = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.vsb.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll(-1 if e.delta > 0 else 1, 'units', 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-1, 'units', 3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(1, 'units', 3))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-1, 'pages'))
+        self.tree.bind('<Next>', lambda e: self.scroll(1, 'pages'))
+
+    def set_data(self, df):
+        self.df = df.reset_index(drop=True)
+        self.order = np.arange(len(self.df))
+        self.sort_state = {}
+        self._sort_cache = {}
+        self.offset = 0
+        self.refresh()
+
+    def _argsort(self, source, ascending):
+        # Stable row order for one column/direction, computed on the typed values
+        # (missing values last either way) and cached until the data changes.
+        key = (source, ascending)
+        if key not in self._sort_cache:
+            values = self.df[source]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                values = values.astype('int64').where(values.notna())
+            if pd.api.types.is_numeric_dtype(values):
+                arr = values.to_numpy(dtype=float)
+                arr = np.where(np.isnan(arr), np.inf, arr if ascending else -arr)
+                order = np.argsort(arr, kind='stable')
+            else:
+                order = (values.fillna('').astype(str)
+                         .sort_values(ascending=ascending, kind='stable').index.to_numpy())
+            self._sort_cache[key] = order
+        return self._sort_cache[key]
+
+    def sort_by(self, col):
+        if self.df.empty:
+            return
+        ascending = not self.sort_state.get(col, False)
+        self.sort_state[col] = ascending
+        source = next(c[2] for c in self.columns if c[0] == col)
+        self.order = self._argsort(source, ascending)
+        self.offset = 0
+        self.refresh()
+
+    def _on_resize(self, event):
+        style = ttk.Style(self)
+        row_height = style.lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT
+        visible = max(1, (event.height - HEADER_HEIGHT) // int(row_height))
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(value) * len(self.order))
+            self.refresh()
+        else:
+            self.scroll(int(value), unit)
+
+    def scroll(self, step, unit='units', count=1):
+        self.offset += step * (self.visible if unit == 'pages' else count)
+        self.refresh()
+
+    def refresh(self):
+        total = len(self.order)
+        self.offset = max(0, min(self.offset, total - self.visible))
+        window = self.df.iloc[self.order[self.offset:self.offset + self.visible]]
+        cells = [fmt(window[source]) if source in window.columns else [''] * len(window)
+                 for _, _, source, fmt in self.columns]
+        self.tree.delete(*self.tree.get_children())
+        for values in zip(*cells):
+            self.tree.insert('', 'end', values=values)
+        if total:
+            self.vsb.set(self.offset / total, min(1.0, (self.offset + self.visible) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
@@ -1,18 +1,17 @@
 import os
-import re
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
-from tkcalendar import DateEntry
 from datetime import date, datetime
 import calendar
-import pandas as pd
-pd.set_option('future.no_silent_downcasting', True)
-import sqlite3
+import threading
+from collections import OrderedDict
+from functools import cached_property
 
-from helpers.db_helpers import DatabaseHelper
-from helpers.pdf_helpers import PDFHelper
-from helpers.email_helpers import EmailHelper
+from helpers.startup import StartupTimer
 from helpers.login_dialog import LoginDialog  # <-- Import the login dialog
+from helpers.task_runner import TaskRunner
+# pandas, tkcalendar, ReportLab, openpyxl and the other helpers are imported where
+# they are first used; at launch load_app()/load_lists()/warm_imports() load them behind the login dialog.
 
 # Modern UI: use ttk everywhere and a good theme
 try:
@@ -28,7 +27,15 @@ DEFAULT_AAC = os.path.join(INCLUSION_LIST_DIR, "inclusion_AAClist.xlsx")
 DEFAULT_WAC = os.path.join(INCLUSION_LIST_DIR, "inclusion_WACMckFullLoad.csv")
 DEFAULT_PBM = os.path.join(INCLUSION_LIST_DIR, "inclusion_PBMlist.xlsx")
 REPORT_DIR = os.path.join(BASE_DIR, "ReimbursementReports")
-FIXED_FEE = 10.64
+# Imported on a warm-up thread while the login dialog is up
+WARMUP_MODULES = [
+    'tkcalendar', 'helpers.virtual_grid', 'helpers.claims_query', 'helpers.import_helpers',
+    'openpyxl', 'helpers.batch_reports', 'helpers.email_helpers',
+]
+# Control changes within this window collapse into one refresh
+REFRESH_DEBOUNCE_MS = 250
+# Fetched+priced frames kept for recently viewed (from, to, filter, pbm) selections
+VIEW_CACHE_SIZE = 8
 
 PROFILE_FIELDS = [
     ("pharmacy_name", "Pharmacy Name"),
@@ -41,70 +48,56 @@ PROFILE_FIELDS = [
     ("contact_person", "Contact Person"),
 ]
 
-def clean_numeric(value):
-    if pd.isna(value):
-        return 0.0
-    s = str(value).strip()
-    if s == '':
-        return 0.0
-    negative = False
-    if s.startswith('(') and s.endswith(')'):
-        negative = True
-        s = s[1:-1]
-    s = re.sub(r'[^0-9.\-]', '', s)
-    try:
-        num = float(s)
-    except ValueError:
-        return 0.0
-    return -num if negative else num
-
-def normalize_date(val):
-    try:
-        dt = pd.to_datetime(val, errors='coerce')
-        if pd.isna(dt):
-            return ''
-        return dt.strftime('%Y-%m-%d')
-    except Exception:
-        return ''
-
-def resolve_columns(raw_cols):
-    import difflib
-    variants = {
-        'script': ['script', 'prescription id', 'rx number', 'rx', 'script id', 'rx#'],
-        'total_paid': ['total paid', 'total_paid', 'paid amount', 'amount paid', 'payment'],
-        'date_dispensed': ['date dispensed', 'dispense date', 'fill date', 'date of fill', 'date_filled'],
-        'drug_ndc': ['drug ndc', 'ndc', 'ndc code'],
-        'drug_name': ['drug name', 'medication', 'product name', 'drug'],
-        'qty': ['qty', 'quantity', 'quantity billed', 'amount dispensed', 'dispensed quantity'],
-        'bin': ['bin']
-    }
-    lc_to_orig = {c.strip().lower(): c for c in raw_cols}
-    resolved = {}
-    unmatched_required = []
-    for canonical, possibles in variants.items():
-        found = None
-        for p in possibles:
-            if p in lc_to_orig:
-                found = lc_to_orig[p]
-                break
-        if not found:
-            matches = difflib.get_close_matches(canonical, list(lc_to_orig.keys()), n=1, cutoff=0.7)
-            if matches:
-                found = lc_to_orig[matches[0]]
-            else:
-                for p in possibles:
-                    matches = difflib.get_close_matches(p, list(lc_to_orig.keys()), n=1, cutoff=0.7)
-                    if matches:
-                        found = lc_to_orig[matches[0]]
-                        break
-        if found:
-            resolved[canonical] = found
-        else:
-            if canonical in ('script', 'total_paid', 'date_dispensed'):
-                unmatched_required.append(canonical)
-            else:
-                resolved[canonical] = None
-    return resolved, unmatched_required
+# Import columns offered in the column-mapping dialog: (column, label, required)
+MAPPING_FIELDS = [
+    ('script', 'Script', True),
+    ('total_paid', 'Total Paid', True),
+    ('date_dispensed', 'Date Dispensed', True),
+    ('drug_ndc', 'Drug NDC', False),
+    ('drug_name', 'Drug Name', False),
+    ('qty', 'Qty', False),
+    ('bin', 'BIN', False),
+]
+
+# Grid columns per tab: (column, heading, source column, formatter name)
+COMMERCIAL_COLUMNS = [
+    ('date_dispensed', 'Date', 'date_dispensed', 'date'),
+    ('script', 'Script', 'script', 'text'),
+    ('qty', 'Qty', 'qty', 'int'),
+    ('aac', 'Medicaid Rate', 'aac', 'money'),
+    ('method', 'Method', 'method', 'text'),
+    ('expected_paid', 'Expected', 'expected_paid', 'money'),
+    ('total_paid', 'Original Paid', 'total_paid', 'money'),
+    ('difference', 'Owed', 'difference', 'money'),
+    ('pdf_file', 'Report', 'pdf_commercial', 'text'),
+    ('status', 'Status', 'status', 'text'),
+]
+UPDATED_COLUMNS = [
+    ('date_dispensed', 'Date', 'date_dispensed', 'date'),
+    ('script', 'Script', 'script', 'text'),
+    ('total_paid', 'Original Paid', 'total_paid', 'money'),
+    ('new_paid', 'New Paid', 'new_paid', 'money'),
+    ('updated_diff', 'Updated Difference', 'updated_diff', 'money'),
+    ('pdf_file', 'Report', 'pdf_updated', 'text'),
+]
+FEDERAL_COLUMNS = [
+    ('date_dispensed', 'Date', 'date_dispensed', 'date'),
+    ('script', 'Script', 'script', 'text'),
+    ('qty', 'Qty', 'qty', 'int'),
+    ('aac', 'AAC', 'aac', 'money'),
+    ('expected_paid', 'Expected', 'expected_paid', 'money'),
+    ('total_paid', 'Original Paid', 'total_paid', 'money'),
+    ('difference', 'Diff', 'difference', 'money'),
+    ('pdf_file', 'Report', 'pdf_federal', 'text'),
+]
+
+def rounds_to_zero(values):
+    import pandas as pd
+    # Vectorized round(v, 2) == 0; only values this close to zero need the exact Python round
+    mask = pd.Series(False, index=values.index)
+    near = values[values.abs() < 0.01]
+    mask[near.index] = [round(v, 2) == 0 for v in near]
+    return mask
 
 def ensure_profile_table_exists(conn):
     c = conn.cursor()
@@ -177,60 +170,108 @@ class ProfileDialog(tk.Toplevel):
         messagebox.showinfo("Saved", "Profile saved successfully.")
         self.destroy()
 
+class HeaderMappingDialog(tk.Toplevel):
+    def __init__(self, master, file_name, headers, mapping, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.title("Column Mapping")
+        self.result = None
+        self.vars = {}
+        frm = ttk.Frame(self)
+        frm.pack(fill='both', expand=True, padx=16, pady=16)
+        ttk.Label(
+            frm, wraplength=420,
+            text=f"Check how the columns of {file_name} are read. The mapping is saved and "
+                 f"used for every file with the same headers."
+        ).grid(row=0, column=0, columnspan=2, sticky='w', pady=(0, 8))
+        for i, (key, label, required) in enumerate(MAPPING_FIELDS, start=1):
+            ttk.Label(frm, text=label + (" *:" if required else ":")).grid(row=i, column=0, sticky='e', pady=4, padx=4)
+            var = tk.StringVar(value=mapping.get(key) or "")
+            ttk.Combobox(frm, textvariable=var, values=[""] + list(headers), state='readonly', width=38
+                         ).grid(row=i, column=1, sticky='w', pady=4)
+            self.vars[key] = var
+        btns = ttk.Frame(frm)
+        btns.grid(row=len(MAPPING_FIELDS) + 1, column=0, columnspan=2, pady=(12, 0))
+        ttk.Button(btns, text="Save Mapping", command=self.save).pack(side='left', padx=6)
+        ttk.Button(btns, text="Skip File", command=self.destroy).pack(side='left', padx=6)
+        self.transient(master)
+        self.grab_set()
+    def save(self):
+        mapping = {k: v.get() or None for k, v in self.vars.items()}
+        missing = [label for key, label, required in MAPPING_FIELDS if required and not mapping[key]]
+        if missing:
+            messagebox.showwarning("Missing columns", f"Choose a column for: {', '.join(missing)}", parent=self)
+            return
+        self.result = mapping
+        self.destroy()
+
+def open_database():
+    import pandas as pd
+    from helpers.db_helpers import DatabaseHelper
+    pd.set_option('future.no_silent_downcasting', True)
+    return DatabaseHelper(
+        BASE_DIR,
+        inclusion_dir=INCLUSION_LIST_DIR,
+        default_aac=DEFAULT_AAC,
+        default_wac=DEFAULT_WAC,
+        default_pbm=DEFAULT_PBM
+    )
+
+def load_app(startup):
+    # Warm-up thread: open app.db, all the login dialog waits for
+    startup.timed_import('helpers.db_helpers')
+    db = open_database()
+    startup.mark('app.db open')
+    return db
+
+def load_lists(startup, app_db):
+    # Warm-up thread: once app.db is open, load the inclusion lists while the user logs in.
+    # Per list: unchanged since the last launch, from the frame cache, or parsed
+    for result in app_db.result().load_inclusion_lists():
+        startup.took(f"{result['table']} {result['source']}", result['seconds'])
+    startup.mark('inclusion lists loaded')
+
+def warm_imports(startup):
+    # Warm-up thread: the dashboard's remaining heavy modules, so first use doesn't wait on them
+    for name in WARMUP_MODULES:
+        startup.timed_import(name)
+
 class ReimbursementComparer:
-    def __init__(self, master):
+    def __init__(self, master, db=None):
         self.master = master
-        self.db = DatabaseHelper(
-            BASE_DIR,
-            inclusion_dir=INCLUSION_LIST_DIR,
-            default_aac=DEFAULT_AAC,
-            default_wac=DEFAULT_WAC,
-            default_pbm=DEFAULT_PBM
-        )
-        self.pdf = PDFHelper(REPORT_DIR)
-        self.email = EmailHelper(REPORT_DIR)
-        self.profile_conn = sqlite3.connect(os.path.join(BASE_DIR, "app.db"))
+        self.db = db or open_database()
+        self.profile_conn = self.db.conn
         ensure_profile_table_exists(self.profile_conn)
         self.profile = get_profile(self.profile_conn)
-        self.db.load_pbm()
-        self.db.load_baseline()
-        self.db.load_alt_rates()
+        self.db.load_inclusion_lists()
         self.current_email = ''
         self._status_clear_job = None
+        self.tasks = TaskRunner(master)
+        self._jobs = set()
+        self._refresh_job = None
+        self._view_cache = OrderedDict()
+        self._view_cache_lock = threading.Lock()
+        master.protocol("WM_DELETE_WINDOW", self.close)
         self.build_dashboard(master)
 
-    # --- SORTING UTILS ---
-    def _sort_treeview(self, tree, col, data_list, value_func=None):
-        direction = getattr(tree, "_sort_dir", {})
-        reverse = direction.get(col, False)
-        direction[col] = not reverse
-        tree._sort_dir = direction
-
-        if not value_func:
-            value_func = lambda v: v
-
-        sorted_list = sorted(data_list, key=lambda x: value_func(x[col]), reverse=reverse)
-        for item in tree.get_children():
-            tree.delete(item)
-        for row in sorted_list:
-            tree.insert('', 'end', values=[row[c] for c in tree["columns"]])
-
-    def _treeview_sort_handler(self, tree, df, cols, col_types):
-        def handler(col):
-            data = []
-            for item in tree.get_children():
-                vals = tree.item(item, "values")
-                row = {name: val for name, val in zip(cols, vals)}
-                if col_types[col]:
-                    try:
-                        row[col] = col_types[col](row[col].replace(",","").replace("$",""))
-                    except:
-                        row[col] = 0
-                data.append(row)
-            self._sort_treeview(tree, col, data, value_func=lambda v: v)
-        for i, col in enumerate(cols):
-            tree.heading(col, command=lambda c=col: handler(c))
-    # --- END SORTING UTILS ---
+    # Report, batch and email helpers are built on first use (ReportLab, mail stack)
+    @cached_property
+    def pdf(self):
+        from helpers.pdf_helpers import PDFHelper
+        return PDFHelper(REPORT_DIR)
+
+    @cached_property
+    def batch(self):
+        from helpers.batch_reports import BatchReports
+        return BatchReports(self.db, REPORT_DIR)
+
+    @cached_property
+    def email(self):
+        from helpers.email_helpers import EmailHelper
+        return EmailHelper(REPORT_DIR)
+
+    def close(self):
+        self.tasks.shutdown()
+        self.master.destroy()
 
     def set_status(self, msg, duration=6000):
         if hasattr(self, 'status_var'):
@@ -240,6 +281,8 @@ class ReimbursementComparer:
             self._status_clear_job = self.master.after(duration, lambda: self.status_var.set(''))
 
     def build_dashboard(self, master):
+        from tkcalendar import DateEntry
+        from helpers.virtual_grid import VirtualGrid
         master.title("Pharmacy Owedbook Dashboard")
         style = ttk.Style(master)
         if "arc" in style.theme_names():
@@ -256,12 +299,13 @@ class ReimbursementComparer:
         ctrl = ttk.Frame(master); ctrl.pack(fill='x', pady=4, padx=4)
         ttk.Button(ctrl, text='Import User Data', command=self.import_data).pack(side='left', padx=4)
         ttk.Button(ctrl, text='Profile', command=self.show_profile_dialog).pack(side='left', padx=4)
+        ttk.Button(ctrl, text='Batch PDFs', command=lambda: self.batch_pdfs(*self._current_controls()[:2])).pack(side='left', padx=4)
         ttk.Label(ctrl, text='From:').pack(side='left')
         self.ctrl_from = DateEntry(ctrl, date_pattern='yyyy-mm-dd'); self.ctrl_from.pack(side='left', padx=4)
         ttk.Label(ctrl, text='To:').pack(side='left')
         self.ctrl_to = DateEntry(ctrl, date_pattern='yyyy-mm-dd'); self.ctrl_to.pack(side='left', padx=4)
-        self.ctrl_from.bind("<<DateEntrySelected>>", lambda e: self._render_all(*self._current_controls()))
-        self.ctrl_to.bind("<<DateEntryEntry>>", lambda e: self._render_all(*self._current_controls()))
+        self.ctrl_from.bind("<<DateEntrySelected>>", lambda e: self.schedule_refresh())
+        self.ctrl_to.bind("<<DateEntryEntry>>", lambda e: self.schedule_refresh())
         today = date.today()
         fd = today.replace(day=1)
         ld = today.replace(day=calendar.monthrange(today.year, today.month)[1])
@@ -269,17 +313,18 @@ class ReimbursementComparer:
         ttk.Label(ctrl, text='Filter:').pack(side='left', padx=(16,0))
         self.ctrl_filter = ttk.Combobox(ctrl, values=['All','Underpaid','Overpaid'], state='readonly')
         self.ctrl_filter.set('All'); self.ctrl_filter.pack(side='left', padx=4)
-        self.ctrl_filter.bind("<<ComboboxSelected>>", lambda e: self._render_all(*self._current_controls()))
+        self.ctrl_filter.bind("<<ComboboxSelected>>", lambda e: self.schedule_refresh())
         ttk.Label(ctrl, text='PBM:').pack(side='left', padx=(16,0))
         vals = [r[0] for r in self.db.conn.execute("SELECT DISTINCT pbm_name FROM pbm_info")] + ['Federal']
         pbms = ['All'] + sorted(set(vals))
         self.ctrl_pbm = ttk.Combobox(ctrl, values=pbms, state='readonly')
         self.ctrl_pbm.set('All'); self.ctrl_pbm.pack(side='left', padx=4)
-        self.ctrl_pbm.bind("<<ComboboxSelected>>", lambda e: self._render_all(*self._current_controls()))
+        self.ctrl_pbm.bind("<<ComboboxSelected>>", lambda e: self.schedule_refresh())
         status_frame = ttk.Frame(master)
         status_frame.pack(fill='x', padx=4)
         self.status_var = tk.StringVar()
-        ttk.Label(status_frame, textvariable=self.status_var, anchor='w').pack(fill='x')
+        ttk.Label(status_frame, textvariable=self.status_var, anchor='w').pack(side='left', fill='x', expand=True)
+        self.btn_cancel = ttk.Button(status_frame, text='Cancel', command=self.cancel_jobs)
         self.kpi_frame = ttk.Frame(master)
         self.kpi_frame.pack(fill='x', padx=4, pady=(0,4))
         # Use ttk.Label for KPIs
@@ -318,6 +363,16 @@ class ReimbursementComparer:
         self.f1, self.f2, self.f3, self.f4 = [ttk.Frame(t) for t in (t1, t2, t3, t4)]
         for f in (self.f1, self.f2, self.f3, self.f4):
             f.pack(fill='both', expand=True)
+        # Commercial/Updated/Federal are virtual grids built once; refresh only swaps their
+        # data, and a tab is drawn when it is (or becomes) the selected one.
+        self.grids = [VirtualGrid(f, cols) for f, cols in
+                      ((self.f1, COMMERCIAL_COLUMNS), (self.f2, UPDATED_COLUMNS), (self.f3, FEDERAL_COLUMNS))]
+        for g in self.grids:
+            g.pack(fill='both', expand=True)
+            g.tree.bind("<Double-1>", lambda e, t=g.tree, c=g.names: self._on_double(e,t,c))
+        self._tab_data = {}
+        self._dirty_tabs = set()
+        self.nb.bind("<<NotebookTabChanged>>", lambda e: self._render_active_tab())
         bottom = ttk.Frame(master); bottom.pack(fill='x', pady=4)
         self.lbl_email = ttk.Label(bottom, text="", style="Email.TLabel", cursor="hand2")
         self.lbl_email.pack(side='left', padx=8)
@@ -325,7 +380,7 @@ class ReimbursementComparer:
         style.configure("Email.TLabel", font=("Segoe UI", 9, "underline"), foreground="blue")
         self.btn_save = ttk.Button(bottom, text='Save PDF', command=lambda: self.save_pdf(*self._current_controls()))
         self.btn_email = ttk.Button(bottom, text='Send Email', command=lambda: self.manual_email_dialog(*self._current_controls()))
-        self._render_all(*self._current_controls())
+        self.refresh()
 
     def show_profile_dialog(self):
         dlg = ProfileDialog(self.master, self.profile_conn)
@@ -345,119 +400,145 @@ class ReimbursementComparer:
         )
         if not files:
             return
-        total_inserted = 0
-        total_updated = 0
-        for p in files:
-            ext = os.path.splitext(p)[1].lower()
-            try:
-                if ext in (".xlsx", ".xlsm"):
-                    df = pd.read_excel(p, dtype=str, engine="openpyxl")
-                elif ext == ".xls":
-                    df = pd.read_excel(p, dtype=str, engine="xlrd")
-                elif ext == ".csv":
-                    df = pd.read_csv(p, dtype=str, engine="python", on_bad_lines='skip')
-                else:
-                    continue
-            except Exception as e:
-                messagebox.showwarning("Import failed", f"Could not read {os.path.basename(p)}: {e}")
-                self.set_status(f"Failed to read {os.path.basename(p)}: {e}")
-                continue
-            resolved, missing_required = resolve_columns(df.columns)
-            if missing_required:
-                msg = (
-                    f"File {os.path.basename(p)} is missing required columns: "
-                    f"{', '.join(missing_required)}. Detected headers: {list(df.columns)}"
-                )
-                messagebox.showwarning("Import skipped", msg)
-                self.set_status(f"Skipped {os.path.basename(p)} (missing: {', '.join(missing_required)})")
+        self._import_files(list(files))
+
+    def _import_files(self, files):
+        # Position of each chosen file: the rows are written in this order
+        self._import_order = {path: i for i, path in enumerate(files)}
+        self._remap = []
+        self._start_job(
+            self._read_import_files, files,
+            on_progress=self._on_import_progress,
+            on_done=self._finish_import,
+            on_cancel=lambda: self.set_status("Import cancelled; nothing was written.")
+        )
+
+    def _read_import_files(self, task, files, mappings=None):
+        # Worker thread: files are read and normalized in a process pool, known layouts
+        # with their saved column mapping (or ``mappings``, when files are read again with
+        # the ones just confirmed); the frames come back in file order for _write_plan
+        from helpers.import_helpers import claims_cache, parse_claims_files
+        if mappings is None:
+            mappings = {sig: mapping for sig, (mapping, _) in self.db.headers.mappings().items()}
+        return parse_claims_files(files, mappings=mappings, check=task.check, on_file=task.progress,
+                                  cache=claims_cache(self.db.frame_cache))
+
+    def _on_import_progress(self, kind, path, info):
+        name = os.path.basename(path)
+        if kind == 'failed':
+            messagebox.showwarning("Import failed", f"Could not read {name}: {info}")
+            self.set_status(f"Failed to read {name}: {info}")
+        elif kind == 'skipped':
+            missing_required, layout = info
+            msg = (
+                f"File {name} is missing required columns: "
+                f"{', '.join(missing_required)}. Detected headers: {layout['headers']}"
+            )
+            if messagebox.askyesno("Import skipped", msg + "\n\nMap its columns by hand?"):
+                self._remap.append((path, layout))
+            self.set_status(f"Skipped {name} (missing: {', '.join(missing_required)})")
+        elif kind == 'streamed':
+            self.set_status(f"{name} is large; it will be imported in chunks ({info[1]})")
+        else:
+            _, applied, _ = info
+            self.set_status(f"Read {name}: {applied}")
+
+    def _confirm_mapping(self, path, layout):
+        # Ask once per layout; the confirmed (possibly corrected) mapping is pinned
+        dlg = HeaderMappingDialog(self.master, os.path.basename(path), layout['headers'], layout['mapping'])
+        self.master.wait_window(dlg)
+        if dlg.result is not None:
+            self.db.headers.save(layout['headers'], dlg.result, pinned=True)
+        return dlg.result
+
+    def _finish_import(self, parsed):
+        # Pinned mapping per layout; new or unconfirmed layouts are confirmed once per import
+        saved = {sig: mapping for sig, (mapping, is_pinned) in self.db.headers.mappings().items() if is_pinned}
+        plan, reread, mappings = [], [], {}
+        for path, df, layout in parsed:
+            sig = layout['signature']
+            if sig not in saved:
+                saved[sig] = self._confirm_mapping(path, layout)
+            if saved[sig] is None:
+                self.set_status(f"Skipped {os.path.basename(path)}")
                 continue
-            rename_map = {resolved[canon]: canon for canon in resolved if resolved.get(canon)}
-            df = df.rename(columns=rename_map)
-            applied = ", ".join(f"{orig}→{new}" for orig, new in rename_map.items())
-            self.set_status(f"Imported {os.path.basename(p)}: {applied}")
-            df['script'] = df['script'].astype(str).str.strip()
-            df['total_paid'] = df['total_paid'].apply(clean_numeric)
-            df['qty'] = df.get('qty', '').apply(clean_numeric)
-            df['drug_ndc'] = df.get('drug_ndc', '').astype(str).str.replace(r'\D+', '', regex=True)
-            df['drug_name'] = df.get('drug_name', '').astype(str).str.strip()
-            df['bin'] = df.get('bin', '').astype(str).str.strip()
-            df['date_dispensed'] = df['date_dispensed'].apply(normalize_date)
-            for _, r in df.iterrows():
-                if not r['date_dispensed']:
-                    continue
-                existing = self.db.cursor.execute(
-                    f"SELECT total_paid FROM {self.db.QUOTED_USER_TABLE} WHERE script=?", (r['script'],)
-                ).fetchone()
-                if existing is None:
-                    self.db.cursor.execute(f"""
-                        INSERT INTO {self.db.QUOTED_USER_TABLE}(script,date_dispensed,drug_ndc,drug_name,qty,total_paid,new_paid,bin)
-                        VALUES(?,?,?,?,?,?,NULL,?)
-                    """, (r['script'], r['date_dispensed'], r['drug_ndc'],
-                          r['drug_name'], r['qty'], r['total_paid'], r['bin']))
-                    total_inserted += 1
+            if any(saved[sig].get(key) != layout['mapping'].get(key) for key, _, _ in MAPPING_FIELDS):
+                if df is None:
+                    # Not read yet: stream it with the corrected mapping
+                    plan.append((path, None, dict(layout, mapping=saved[sig])))
                 else:
-                    orig = existing[0]
-                    if r['total_paid'] != orig:
-                        self.db.cursor.execute(f"""
-                            UPDATE {self.db.QUOTED_USER_TABLE}
-                            SET date_dispensed=?, drug_ndc=?, drug_name=?, qty=?, new_paid=?, bin=?
-                            WHERE script=?
-                        """, (r['date_dispensed'], r['drug_ndc'], r['drug_name'],
-                              r['qty'], r['total_paid'], r['bin'], r['script']))
-                        total_updated += 1
-        self.db.conn.commit()
-        self.set_status(f"Inserted: {total_inserted}, Updated: {total_updated}")
-        self._render_all(*self._current_controls())
+                    # Corrected by hand: read the file again with the saved mapping
+                    reread.append(path)
+                    mappings[sig] = saved[sig]
+                continue
+            plan.append((path, df, layout))
+        for path, layout in self._remap:
+            mapping = self._confirm_mapping(path, layout)
+            if mapping is not None:
+                reread.append(path)
+                mappings[layout['signature']] = mapping
+        if not reread:
+            self._write_plan(plan)
+            return
+        # Every mapping is confirmed: read those files again, then write all of them together
+        self._start_job(
+            self._read_import_files, reread, mappings,
+            on_progress=self._on_import_progress,
+            on_done=lambda reparsed: self._write_plan(plan + reparsed),
+            on_cancel=lambda: self.set_status("Import cancelled; nothing was written.")
+        )
 
-    def fetch_data(self, start, end, flt, pbm):
-        df_act = pd.read_sql_query(
-            f"SELECT * FROM {self.db.QUOTED_USER_TABLE} WHERE date_dispensed BETWEEN ? AND ?", self.db.conn,
-            params=(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+    def _write_plan(self, plan):
+        # Back in the order the files were chosen, so one upsert dedupes by script as
+        # importing them one after another would
+        plan.sort(key=lambda entry: self._import_order[entry[0]])
+        from helpers.import_helpers import write_claims
+        if all(df is not None for _, df, _ in plan):
+            self._import_written(write_claims(self.db, plan))
+            return
+        # Large CSVs are written chunk by chunk on the worker, each chunk in its own transaction
+        self._start_job(
+            self._write_import, plan,
+            on_progress=self._on_write_progress,
+            on_done=self._import_written,
+            on_cancel=self._import_stopped
         )
-        df_act['date_dispensed'] = pd.to_datetime(df_act['date_dispensed'], errors='coerce')
-        df_bas = pd.read_sql_query("SELECT ndc,aac FROM baseline", self.db.conn)
-        df_alt = pd.read_sql_query("SELECT ndc,wac,pkg_size,pkg_size_mult,generic_indicator FROM alt_rates", self.db.conn)
-        df_pbm = pd.read_sql_query("SELECT bin,pbm_name,email FROM pbm_info", self.db.conn)
-        df_act['ndc'] = df_act['drug_ndc'].astype(str).str.replace(r'\D+', '', regex=True)
-        df_bas['ndc'] = df_bas['ndc'].astype(str).str.replace(r'\D+', '', regex=True)
-        df_alt['ndc']= df_alt['ndc'].astype(str).str.replace(r'\D+', '', regex=True)
-        df = (df_act
-              .merge(df_bas, on='ndc', how='left')
-              .merge(df_alt, on='ndc', how='left', suffixes=('','_alt'))
-              .merge(df_pbm, on='bin', how='left'))
-        df['pbm_name']=df['pbm_name'].fillna('Federal')
-        df['email']   =df['email'].fillna('')
-        df['baseline_present'] = df['aac'].notna()
-        def compute_fallback(r):
-            if r['pkg_size'] > 0 and r['pkg_size_mult'] > 0 and r['wac'] > 0:
-                gi = str(r.get('generic_indicator', '')).strip().upper()
-                if gi == 'N':
-                    return (r['wac'] * 0.96) / (r['pkg_size'] * r['pkg_size_mult'])
-                else:
-                    return r['wac'] / (r['pkg_size'] * r['pkg_size_mult'])
-            return 0.0
-        df['aac'] = df.apply(lambda r: r['aac'] if r['baseline_present'] else compute_fallback(r), axis=1)
-        def method_for_row(r):
-            if r['baseline_present']:
-                return 'AAC'
-            elif r['pkg_size']>0 and r['pkg_size_mult']>0 and r['wac']>0:
-                gi = str(r.get('generic_indicator', '')).strip().upper()
-                if gi == 'N':
-                    return '0.96*WAC/(pkg_size*pkg_size_mult)'
-                else:
-                    return 'WAC/(pkg_size*pkg_size_mult)'
-            else:
-                return ''
-        df['method'] = df.apply(method_for_row, axis=1)
-        df['expected_paid']=df['qty'] * df['aac'] + FIXED_FEE
-        df['difference']   =df['total_paid'] - df['expected_paid']
-        df['updated_diff'] =df['new_paid'] - df['total_paid']
-        if pbm!='All':
-            df = df[df['pbm_name']==pbm]
-        if flt=='Underpaid':
-            df = df[df['difference']<0]
-        elif flt=='Overpaid':
-            df = df[df['difference']>0]
+
+    def _write_import(self, task, plan):
+        from helpers.import_helpers import write_claims
+        return write_claims(self.db, plan, check=task.check, on_file=task.progress,
+                            on_rows=lambda path, rows: task.progress('rows', path, rows))
+
+    def _on_write_progress(self, kind, path, info):
+        # Rows streamed so far, or a streamed file that failed part way ('failed')
+        if kind == 'rows':
+            self.set_status(f"Importing {os.path.basename(path)}: {info:,} rows")
+        else:
+            self._on_import_progress(kind, path, info)
+
+    def _import_written(self, counts):
+        inserted, updated = counts
+        self.set_status(f"Inserted: {inserted}, Updated: {updated}")
+        self.refresh()
+
+    def _import_stopped(self):
+        self.set_status("Import cancelled; chunks already written were kept.")
+        self.refresh()
+
+    def fetch_data(self, start, end, flt, pbm):
+        # Memoized per selection; any data write or inclusion reload changes the key.
+        # Callers must not modify the returned frame in place.
+        key = (start, end, flt, pbm, self.db.data_version, self.db.reference.version)
+        with self._view_cache_lock:
+            if key in self._view_cache:
+                self._view_cache.move_to_end(key)
+                return self._view_cache[key]
+        from helpers.claims_query import fetch_claims
+        df = fetch_claims(self.db, start, end, flt, pbm)
+        with self._view_cache_lock:
+            self._view_cache[key] = df
+            while len(self._view_cache) > VIEW_CACHE_SIZE:
+                self._view_cache.popitem(last=False)
         return df
 
     def _update_action_buttons(self, flt, pbm):
@@ -477,52 +558,83 @@ class ReimbursementComparer:
                 self.btn_email.pack_forget()
 
     def save_pdf(self, start, end, flt, pbm):
+        from helpers.pdf_helpers import REPORT_FOLDERS
         title = self.nb.tab(self.nb.select(), option='text')
-        folder = {
-          'Commercial Dollars':'report_commercialdollars',
-          'Updated Commercial Payments':'report_updatedcommercialdollars',
-          'Federal Dollars':'report_federaldollars',
-          'Summary':'report_summary'
-        }[title]
-        outdir = os.path.join(REPORT_DIR, folder)
-        os.makedirs(outdir, exist_ok=True)
-        fn = f"{folder}_{pbm}_{start}_{end}.pdf".replace(" ", "_")
-        path = os.path.join(outdir, fn)
+        folder = REPORT_FOLDERS[title]
+        self.set_status(f"Saving {title} PDF for {pbm}...")
+        self._start_job(
+            self._build_pdf, start, end, flt, pbm, title, folder, self.profile.get("email", ""),
+            on_done=lambda result: self._finish_pdf(title, folder, result),
+            on_cancel=lambda: self.set_status("PDF export cancelled.")
+        )
+
+    def _build_pdf(self, task, start, end, flt, pbm, title, folder, profile_email):
+        # Worker thread: select the rows without a saved report and draw the PDF
         df = self.fetch_data(start, end, flt, pbm)
         if df.empty:
-            messagebox.showinfo("No Data", "Nothing to export on this filter/pbm.")
-            return
+            return None, []
         scripts = list(df['script'].dropna().unique())
-        existing = []
+        existing = set()
         if scripts:
-            placeholders = ",".join("?" for _ in scripts)
-            q = f"""
-                SELECT script, pdf_file FROM report_files
-                WHERE report_type=? AND script IN ({placeholders}) AND pdf_file IS NOT NULL AND pdf_file<>''
-            """
-            params = [title] + scripts
-            rows = self.db.cursor.execute(q, params).fetchall()
-            existing = [r[0] for r in rows if r[1]]
+            rows = self.db.read_for_scripts("""
+                SELECT script FROM report_files
+                WHERE report_type=? AND script IN {scripts} AND pdf_file IS NOT NULL AND pdf_file<>''
+            """, scripts, [title])
+            existing = set(rows['script'])
         to_include = [s for s in scripts if s not in existing]
         if not to_include:
-            messagebox.showinfo("No New Data", "All rows already have a saved report for this tab; nothing new to export.")
-            return
+            return None, scripts
+        task.check()
         df_export = df[df['script'].isin(to_include)]
-        profile_email = self.profile.get("email", "")
         effective_email = profile_email or (df_export['email'].iloc[0] if not df_export.empty else None)
         path = self.pdf.save_pdf(df_export, folder, pbm, start, end, email=effective_email)
+        return path, to_include
+
+    def _finish_pdf(self, title, folder, result):
+        path, to_include = result
+        if path is None:
+            if not to_include:
+                messagebox.showinfo("No Data", "Nothing to export on this filter/pbm.")
+            else:
+                messagebox.showinfo("No New Data", "All rows already have a saved report for this tab; nothing new to export.")
+            self.set_status('')
+            return
         rel = os.path.join(folder, os.path.basename(path))
-        for s in to_include:
-            self.db.cursor.execute("""
-                INSERT INTO report_files(script, report_type, pdf_file)
-                VALUES(?,?,?)
-                ON CONFLICT(script,report_type) DO UPDATE SET pdf_file=excluded.pdf_file
-            """, (s, title, rel))
-            self.db.cursor.execute(f"UPDATE {self.db.QUOTED_USER_TABLE} SET pdf_file=? WHERE script=?", (rel, s))
-        self.db.conn.commit()
-        self._render_all(*self._current_controls())
+        self.db.attach_report(to_include, title, rel)
+        self.refresh()
         messagebox.showinfo("Saved", f"PDF saved to:\n{path}")
 
+    def batch_pdfs(self, start, end):
+        if not messagebox.askyesno(
+            "Batch PDFs",
+            f"Save the Underpaid Commercial, Updated and Federal reports for every PBM from {start} to {end}?"
+        ):
+            return
+        self.set_status("Preparing batch reports...")
+        self._start_job(
+            self._run_batch, start, end, self.profile.get("email", ""),
+            on_progress=lambda done, total, title, pbm: self.set_status(f"Saved {done}/{total}: {title} for {pbm}"),
+            on_done=self._finish_batch,
+            on_cancel=self._batch_stopped
+        )
+
+    def _run_batch(self, task, start, end, profile_email):
+        # Worker thread: fetch once, render every PBM's reports across processes and record them
+        jobs = self.batch.plan(start, end, profile_email)
+        return self.batch.run(jobs, start, end, check=task.check, on_progress=task.progress)
+
+    def _finish_batch(self, results):
+        if not results:
+            self.set_status('')
+            messagebox.showinfo("No New Data", "Every underpaid script in this period already has its reports.")
+            return
+        self.refresh()
+        messagebox.showinfo("Saved", f"Saved {len(results)} reports to:\n{REPORT_DIR}")
+
+    def _batch_stopped(self):
+        self.set_status("Batch cancelled; reports already saved were kept.")
+        self.refresh()
+
     def manual_email_dialog(self, start, end, flt, pbm):
         if pbm in ("All", "Federal"):
             self.set_status("Select a specific PBM to email.")
@@ -540,10 +652,9 @@ class ReimbursementComparer:
         if not scripts_available:
             self.set_status("No scripts to email.")
             return
-        placeholders = ",".join("?" for _ in scripts_available)
-        df_reports = pd.read_sql_query(
-            f"SELECT script, report_type, pdf_file FROM report_files WHERE script IN ({placeholders}) AND report_type=?",
-            self.db.conn, params=scripts_available + [title]
+        df_reports = self.db.read_for_scripts(
+            "SELECT script, report_type, pdf_file FROM report_files WHERE script IN {scripts} AND report_type=?",
+            scripts_available, [title]
         )
         pdf_to_scripts = {}
         for _, row in df_reports.iterrows():
@@ -593,11 +704,8 @@ class ReimbursementComparer:
             self.email.compose_email_with_attachments(
                 to_email, subject, body, attachments, set_status=self.set_status
             )
-            for _, scripts in selected:
-                for script in scripts:
-                    self.db.cursor.execute(f"UPDATE {self.db.QUOTED_USER_TABLE} SET status=? WHERE script=?", ("emailed PBM", script))
-            self.db.conn.commit()
-            self._render_all(*self._current_controls())
+            self.db.mark_emailed([script for _, scripts in selected for script in scripts])
+            self.refresh()
             dlg.destroy()
         ttk.Button(btn_frame, text="Send", command=on_send).pack(side='right', padx=4)
         ttk.Button(btn_frame, text="Cancel", command=dlg.destroy).pack(side='right')
@@ -612,239 +720,175 @@ class ReimbursementComparer:
             if rel and os.path.exists(full):
                 os.startfile(full)
 
-    def _render_all(self, fd, td, flt, pbm):
+    # --- BACKGROUND JOBS ---
+
+    def _start_job(self, fn, *args, on_done=None, on_cancel=None, on_progress=None):
+        # Long-running user action (import, PDF) on the worker pool, cancellable from the status bar
+        holder = {}
+        def finished(callback):
+            def run(*a):
+                self._jobs.discard(holder['task'])
+                if not self._jobs:
+                    self.btn_cancel.pack_forget()
+                if callback:
+                    callback(*a)
+            return run
+        holder['task'] = self.tasks.submit(
+            fn, *args, on_progress=on_progress, on_done=finished(on_done),
+            on_cancel=finished(on_cancel), on_error=finished(self._on_job_error)
+        )
+        self._jobs.add(holder['task'])
+        self.btn_cancel.pack(side='right', padx=4)
+        return holder['task']
+
+    def cancel_jobs(self):
+        for task in list(self._jobs):
+            task.cancel()
+        self.set_status("Cancelling...")
+
+    def _on_job_error(self, error):
+        self.set_status(f"Error: {error}")
+        # Notes say what else went wrong while the job was failing (e.g. a batch not recorded)
+        messagebox.showerror("Error", "\n\n".join([str(error), *getattr(error, '__notes__', [])]))
+
+    def schedule_refresh(self):
+        # Debounce control events: restart the timer on each change, refresh once it settles
+        if self._refresh_job is not None:
+            self.master.after_cancel(self._refresh_job)
+        self._refresh_job = self.master.after(REFRESH_DEBOUNCE_MS, self.refresh)
+
+    def refresh(self):
+        if self._refresh_job is not None:
+            self.master.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        # Recompute the dashboard off the UI thread; a newer refresh supersedes a pending one
+        controls = self._current_controls()
+        self.tasks.submit(
+            lambda task: self._compute_view(*controls), key='refresh',
+            on_done=self._show_view,
+            on_error=lambda e: self.set_status(f"Refresh failed: {e}")
+        )
+
+    # --- END BACKGROUND JOBS ---
+
+    def _compute_view(self, fd, td, flt, pbm):
+        # Worker thread: everything the dashboard shows, computed without touching widgets or writing
+        from helpers.claims_query import fetch_kpis, fetch_summary
         df = self.fetch_data(fd, td, flt, pbm)
-        self._update_action_buttons(flt, pbm)
-        scripts = list(df['script'].dropna().unique())
-        if scripts:
-            placeholders = ",".join("?" for _ in scripts)
-            df_reports = pd.read_sql_query(
-                f"SELECT script, report_type, pdf_file FROM report_files WHERE script IN ({placeholders})",
-                self.db.conn, params=scripts
-            )
-            for _, row in df_reports.iterrows():
-                rpt = row['report_type']
-                rel = row['pdf_file'] or ''
-                if rel:
-                    full = os.path.join(REPORT_DIR, rel)
-                    if not os.path.exists(full):
-                        self.db.cursor.execute("""
-                            DELETE FROM report_files WHERE script=? AND report_type=?
-                        """, (row['script'], rpt))
-                        self.db.cursor.execute(
-                            f"UPDATE {self.db.QUOTED_USER_TABLE} SET status='' WHERE script=?",
-                            (row['script'],)
-                        )
-        self.db.conn.commit()
-        if scripts:
-            df_reports = pd.read_sql_query(
-                f"SELECT script, report_type, pdf_file FROM report_files WHERE script IN ({placeholders})",
-                self.db.conn, params=scripts
-            )
-            if not df_reports.empty:
-                pivot = df_reports.pivot(index='script', columns='report_type', values='pdf_file')
-                pivot = pivot.rename(columns={
-                    'Commercial Dollars': 'pdf_commercial',
-                    'Updated Commercial Payments': 'pdf_updated',
-                    'Federal Dollars': 'pdf_federal',
-                    'Summary': 'pdf_summary'
-                }).fillna('')
-                df = df.merge(pivot.reset_index(), on='script', how='left')
-        for col in ('pdf_commercial','pdf_updated','pdf_federal','pdf_summary'):
-            if col not in df.columns:
-                df[col] = ''
+        pdf_columns, orphans = self.db.reports.snapshot()
+        df = df.join(pdf_columns, on='script')
         comm = df[df['pbm_name'] != 'Federal']
-        underpaid_total = comm.loc[comm['difference'] < 0, 'difference'].sum()
+        kpis = fetch_kpis(self.db, fd, td, flt, pbm)
+        underpaid_total = kpis['underpaid_total']
         underpaid_amt = -underpaid_total if underpaid_total < 0 else 0.0
-        script_count = comm['script'].nunique()
-        updated_diff_total = comm['updated_diff'].fillna(0).infer_objects(copy=False).sum()
+        updated_diff_total = kpis['updated_diff_total']
+        email = None
+        if flt=='Underpaid' and pbm not in ('All','Federal'):
+            row = self.db.conn.execute("SELECT email FROM pbm_info WHERE pbm_name=?", (pbm,)).fetchone()
+            email = row[0] if row else ''
+        comm_rows = comm
+        if flt != 'All':
+            comm_rows = comm[~rounds_to_zero(comm['difference'])]
+        return {
+            'controls': (fd, td, flt, pbm),
+            'orphans': orphans,
+            'underpaid_amt': underpaid_amt,
+            'script_count': kpis['script_count'],
+            'updated_diff_total': updated_diff_total,
+            'email': email,
+            # Per-tab row sets; only the visible tab is drawn now, the rest on first selection
+            'tabs': {
+                0: comm_rows,
+                1: df[df['new_paid'].notna()],
+                2: df[df['pbm_name']=='Federal'],
+                3: fetch_summary(self.db, fd, td, flt, pbm),
+            },
+        }
+
+    def _show_view(self, view):
+        fd, td, flt, pbm = view['controls']
+        self._update_action_buttons(flt, pbm)
+        # Reports whose PDF was deleted from disk are dropped from the bookkeeping
+        if self.db.reports.drop(view['orphans']):
+            self.db.mark_changed()
+        underpaid_amt = view['underpaid_amt']
+        updated_diff_total = view['updated_diff_total']
         owed = underpaid_amt - updated_diff_total
         # Update KPI labels with ttk
         self.lbl_underpaid_commercial.config(
             text=f"Commercial Underpaid: ${underpaid_amt:,.2f}",
             foreground="red"
         )
-        self.lbl_script_count.config(text=f"Commercial Scripts: {script_count}")
+        self.lbl_script_count.config(text=f"Commercial Scripts: {view['script_count']}")
         color_ud = "green" if updated_diff_total >= 0 else "red"
         self.lbl_updated_difference.config(text=f"Updated Difference: ${updated_diff_total:,.2f}", foreground=color_ud)
         self.lbl_owed.config(text=f"Owed: ${owed:,.2f}", foreground="red")
-        if flt=='Underpaid' and pbm not in ('All','Federal'):
-            row=self.db.cursor.execute("SELECT email FROM pbm_info WHERE pbm_name=?", (pbm,)).fetchone()
-            self.current_email = row[0] if row else ''
+        if view['email'] is not None:
+            self.current_email = view['email']
             self.lbl_email.config(text=f"Email: {self.current_email}")
         else:
             self.current_email=''; self.lbl_email.config(text='')
-        # Recreate all treeviews with ttk
-
-        # --- Commercial Dollars (sortable) ---
-        for w in self.f1.winfo_children(): w.destroy()
-        cols_commercial = ['date_dispensed','script','qty','aac','method',
-                           'expected_paid','total_paid','difference','pdf_file','status']
-        hdrs_commercial = {
-            'date_dispensed':'Date',
-            'script':'Script',
-            'qty':'Qty',
-            'aac':'Medicaid Rate',
-            'method':'Method',
-            'expected_paid':'Expected',
-            'total_paid':'Original Paid',
-            'difference':'Owed',
-            'pdf_file':'Report',
-            'status':'Status'
-        }
-        tr1 = ttk.Treeview(self.f1, columns=cols_commercial, show='headings', style="Treeview")
-        for c in cols_commercial:
-            tr1.heading(c, text=hdrs_commercial[c]); tr1.column(c, width=80, anchor='center')
-        tr1_data = []
-        for _, r in df[df['pbm_name']!='Federal'].iterrows():
-            owed_val = round(r['difference'],2)
-            if flt!='All' and owed_val==0: continue
-            report_ref = r.get('pdf_commercial', '')
-            if pd.isna(report_ref):
-                report_ref = ''
-            status_val = r.get('status','') if not pd.isna(r.get('status','')) else ''
-            vals = (
-                r['date_dispensed'].strftime('%Y-%m-%d') if pd.notna(r['date_dispensed']) else '',
-                r['script'],
-                int(r['qty']) if pd.notna(r['qty']) else 0,
-                f"{r['aac']:.2f}",
-                r.get('method',''),
-                f"{r['expected_paid']:.2f}",
-                f"{r['total_paid']:.2f}",
-                f"{owed_val:.2f}",
-                report_ref,
-                status_val
-            )
-            tr1.insert('', 'end', values=vals)
-            tr1_data.append(dict(zip(cols_commercial, vals)))
-        tr1.pack(fill='both', expand=True)
-        tr1.bind("<Double-1>", lambda e, t=tr1, c=cols_commercial: self._on_double(e,t,c))
-        col_types_1 = {
-            'date_dispensed': None, 'script': None, 'qty': int, 'aac': float, 'method': None,
-            'expected_paid': float, 'total_paid': float, 'difference': float, 'pdf_file': None, 'status': None
-        }
-        self._treeview_sort_handler(tr1, df, cols_commercial, col_types_1)
-
-        # --- Updated Commercial Payments (sortable) ---
-        for w in self.f2.winfo_children(): w.destroy()
-        cols2 = ['date_dispensed','script','total_paid','new_paid','updated_diff','pdf_file']
-        hdr2 = {
-            'date_dispensed':'Date',
-            'script':'Script',
-            'total_paid':'Original Paid',
-            'new_paid':'New Paid',
-            'updated_diff':'Updated Difference',
-            'pdf_file':'Report'
-        }
-        tr2 = ttk.Treeview(self.f2, columns=cols2, show='headings', style="Treeview")
-        for c in cols2:
-            tr2.heading(c, text=hdr2[c]); tr2.column(c, width=80, anchor='center')
-        tr2_data = []
-        df_upd = df[df['new_paid'].notna()]
-        for _, r in df_upd.iterrows():
-            report_ref = r.get('pdf_updated', '')
-            if pd.isna(report_ref):
-                report_ref = ''
-            vals = (
-                r['date_dispensed'].strftime('%Y-%m-%d') if pd.notna(r['date_dispensed']) else '',
-                r['script'],
-                f"{r['total_paid']:.2f}",
-                f"{r['new_paid']:.2f}",
-                f"{r.get('updated_diff', 0.0):.2f}",
-                report_ref
-            )
-            tr2.insert('', 'end', values=vals)
-            tr2_data.append(dict(zip(cols2, vals)))
-        tr2.pack(fill='both', expand=True)
-        tr2.bind("<Double-1>", lambda e, t=tr2, c=cols2: self._on_double(e,t,c))
-        col_types_2 = {
-            'date_dispensed': None, 'script': None, 'total_paid': float, 'new_paid': float,
-            'updated_diff': float, 'pdf_file': None
-        }
-        self._treeview_sort_handler(tr2, df, cols2, col_types_2)
-
-        # --- Federal Dollars (sortable) ---
-        for w in self.f3.winfo_children(): w.destroy()
-        cols_federal = ['date_dispensed','script','qty','aac',
-                        'expected_paid','total_paid','difference','pdf_file']
-        hdrs_federal = {
-            'date_dispensed':'Date',
-            'script':'Script',
-            'qty':'Qty',
-            'aac':'AAC',
-            'expected_paid':'Expected',
-            'total_paid':'Original Paid',
-            'difference':'Diff',
-            'pdf_file':'Report'
-        }
-        tr3 = ttk.Treeview(self.f3, columns=cols_federal, show='headings', style="Treeview")
-        for c in cols_federal:
-            tr3.heading(c, text=hdrs_federal[c]); tr3.column(c, width=80, anchor='center')
-        tr3_data = []
-        fed = df[df['pbm_name']=='Federal']
-        for _, r in fed.iterrows():
-            report_ref = r.get('pdf_federal', '')
-            if pd.isna(report_ref):
-                report_ref = ''
-            vals = (
-                r['date_dispensed'].strftime('%Y-%m-%d') if pd.notna(r['date_dispensed']) else '',
-                r['script'],
-                int(r['qty']) if pd.notna(r['qty']) else 0,
-                f"{r['aac']:.2f}",
-                f"{r['expected_paid']:.2f}",
-                f"{r['total_paid']:.2f}",
-                f"{r['difference']:.2f}",
-                report_ref
-            )
-            tr3.insert('', 'end', values=vals)
-            tr3_data.append(dict(zip(cols_federal, vals)))
-        tr3.pack(fill='both', expand=True)
-        tr3.bind("<Double-1>", lambda e, t=tr3, c=cols_federal: self._on_double(e,t,c))
-        col_types_3 = {
-            'date_dispensed': None, 'script': None, 'qty': int, 'aac': float,
-            'expected_paid': float, 'total_paid': float, 'difference': float, 'pdf_file': None
-        }
-        self._treeview_sort_handler(tr3, df, cols_federal, col_types_3)
+        self._tab_data = view['tabs']
+        self._dirty_tabs = set(self._tab_data)
+        self._render_active_tab()
 
-        # --- Summary ---
+    def _render_active_tab(self):
+        idx = self.nb.index(self.nb.select())
+        if idx not in self._dirty_tabs:
+            return
+        self._dirty_tabs.discard(idx)
+        if idx < len(self.grids):
+            self.grids[idx].set_data(self._tab_data[idx])
+        else:
+            self._render_summary(self._tab_data[idx])
+
+    def _render_summary(self, summary):
         for w in self.f4.winfo_children(): w.destroy()
-        summary = df.groupby('pbm_name')['difference'].sum().reset_index()
-        fed_sum = round(df.loc[df['pbm_name']=='Federal','difference'].sum(),2)
+        fed_sum = round(summary.loc[summary['pbm_name']=='Federal','difference'].sum(),2)
         tr4 = ttk.Treeview(self.f4, columns=['pbm_name','Commercial Dollars','Federal Dollars'], show='headings', style="Treeview")
         tr4.heading('pbm_name', text='PBM Name'); tr4.column('pbm_name', width=200, anchor='center')
         tr4.heading('Commercial Dollars', text='Commercial Dollars'); tr4.column('Commercial Dollars', width=150, anchor='center')
         tr4.heading('Federal Dollars', text='Federal Dollars'); tr4.column('Federal Dollars', width=150, anchor='center')
         total_com = 0.0
-        for _, r in summary.iterrows():
-            if r['pbm_name'] != 'Federal':
-                cd = round(r['difference'],2)
-                tr4.insert('', 'end', values=(r['pbm_name'], f"{cd:.2f}", ''))
+        for r in summary.itertuples(index=False):
+            if r.pbm_name != 'Federal':
+                cd = round(r.difference,2)
+                tr4.insert('', 'end', values=(r.pbm_name, f"{cd:.2f}", ''))
                 total_com += cd
             else:
-                fd = round(r['difference'],2)
-                tr4.insert('', 'end', values=(r['pbm_name'], '', f"{fd:.2f}"))
+                fd = round(r.difference,2)
+                tr4.insert('', 'end', values=(r.pbm_name, '', f"{fd:.2f}"))
         tr4.insert('', 'end', values=('Total', f"{total_com:.2f}", f"{fed_sum:.2f}"))
         tr4.pack(fill='both', expand=True)
 
 if __name__ == '__main__':
+    startup = StartupTimer()
     root = root_class()
-    db = DatabaseHelper(BASE_DIR,
-                        inclusion_dir=INCLUSION_LIST_DIR,
-                        default_aac=DEFAULT_AAC,
-                        default_wac=DEFAULT_WAC,
-                        default_pbm=DEFAULT_PBM)
     # Hide the main window while showing login
     root.withdraw()
-    
+    # app.db, the inclusion lists and the heavy imports load behind the login dialog
+    app_db = startup.warm_up(load_app, startup)
+    lists = startup.warm_up(load_lists, startup, app_db)
+    startup.warm_up(warm_imports, startup)
+
     # Display login dialog
-    login = LoginDialog(root, db)
+    login = LoginDialog(root, app_db)
+    login.update_idletasks()
+    startup.mark('login dialog shown')
     root.wait_window(login)
     
     if login.result is None:
         # Login was canceled or failed -- exit
         root.destroy()
+    elif lists.exception() is not None:
+        # Waits for the inclusion lists; without them there is no dashboard to show
+        messagebox.showerror("Startup Failed", f"Could not load the inclusion lists:\n{lists.exception()}")
+        root.destroy()
     else:
         # Login successful -- show dashboard
         root.deiconify()
-        app = ReimbursementComparer(root)
-        root.mainloop()
\ No newline at end of file
+        app = ReimbursementComparer(root, app_db.result())
+        root.update_idletasks()
+        startup.mark('dashboard shown')
+        startup.report_if_requested()
+        root.mainloop()
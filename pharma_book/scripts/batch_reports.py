@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Headless month-end packet: save every PBM's Underpaid Commercial, Updated and
+Federal PDFs for a period and record them in report_files, without the GUI.
+
+Uses the app's own app.db, inclusion_lists/ and ReimbursementReports/.
+Scripts that already have a saved report of a type are skipped.
+
+Run: python scripts/batch_reports.py --from 2025-07-01 --to 2025-07-31 [--workers 4] [--email me@pharmacy.com]
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from helpers.batch_reports import BatchReports  # noqa: E402
+from helpers.db_helpers import DatabaseHelper  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument('--from', dest='start', type=date.fromisoformat, required=True)
+    ap.add_argument('--to', dest='end', type=date.fromisoformat, required=True)
+    ap.add_argument('--workers', type=int, default=None, help='render processes (default: CPU count)')
+    ap.add_argument('--email', default='', help='email printed on the reports (default: the PBM contact)')
+    args = ap.parse_args()
+
+    db = DatabaseHelper(ROOT)
+    db.load_inclusion_lists()
+    batch = BatchReports(db, os.path.join(ROOT, "ReimbursementReports"), max_workers=args.workers)
+    t0 = time.perf_counter()
+    jobs = batch.plan(args.start, args.end, args.email)
+    results = batch.run(
+        jobs, args.start, args.end,
+        on_progress=lambda done, total, title, pbm: print(f"[{done}/{total}] {title}: {pbm}")
+    )
+    rows = sum(len(scripts) for _, _, scripts in results)
+    db.close()
+    print(f"Saved {len(results)} reports ({rows} report_files rows) in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark the column-wise import normalizers (helpers/import_helpers.py) against
+the per-cell clean_numeric / normalize_date they replaced in normalize_claims.
+
+First a golden corpus of tricky money and date strings (currency symbols,
+thousands separators, parenthesized negatives, blanks, junk, mixed date
+formats) is run through both and checked to be identical, including the sign
+of zero. A CSV export with short, over-long, blank, multi-line and unclosed-quote
+records is then streamed at several chunk sizes and checked to normalize to the
+same rows as reading it whole. Then both are timed on synthetic claim columns of
+each size.
+
+Run: python scripts/bench_import.py [--sizes 10000 50000 200000] [--seed 42]
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from helpers.import_helpers import (  # noqa: E402
+    claims_layout, clean_numeric, clean_numeric_column, normalize_claims, normalize_date,
+    normalize_date_column, read_claims_file, stream_claims_csv,
+)
+
+GOLDEN_MONEY = [
+    '12.50', '$1,234.56', '(12.50)', '($1,234.56)', '-3.10', '  7 ', '', '   ', np.nan, None,
+    '0', '-0', '(0)', '(-3)', '(abc)', '()', '(', ')', '1-2', '-', '.', '.5', '5.', '-.5', '--5',
+    '12.3.4', '1e5', '+5', '1_000', 'nan', 'inf', 'N/A', 'USD 10', '10 USD', '€9,99', '١٢٣',
+    '00012.3400', '1,000,000', '(1,000.00)', ' ( 4.20 ) ', '$-5', '5-', '3.14159265358979323846',
+    '123456789012345678901234567890', '0.1', '0.30000000000000004',
+]
+GOLDEN_DATES = [
+    '2025-07-01', '2025-7-1', '07/01/2025', '7/1/2025', '7/1/25', '13/07/2025', '01/13/2025',
+    '2025-07-01 13:45:00', '2025-07-01T13:45:00', '2025-07-01 13:45:00+02:00', '2025-07-01 09:00:00-05:00',
+    'July 1, 2025', 'Jul 1 2025', '1 Jul 2025', '01-Jul-2025', '20250701', '2025/07/01', '2025.07.01',
+    '45838', '', '  ', 'garbage', 'N/A', np.nan, None, '2025-02-30', '0001-01-01', '9999-12-31',
+    '2025-07', '07/2025', 'Tuesday, July 1, 2025', '2025-07-01 00:00:00.000', '1/2/3',
+]
+
+
+def same_floats(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return a.shape == b.shape and np.array_equal(a.view(np.int64), b.view(np.int64))
+
+
+def check_golden():
+    money = pd.Series(GOLDEN_MONEY, dtype=object)
+    expected = money.apply(clean_numeric)
+    got = clean_numeric_column(money)
+    bad = [(v, e, g) for v, e, g in zip(GOLDEN_MONEY, expected, got) if not same_floats([e], [g])]
+    assert not bad, f"clean_numeric mismatch: {bad}"
+
+    dates = pd.Series(GOLDEN_DATES * 3, dtype=object)  # repeats exercise the per-value cache
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        expected = dates.apply(normalize_date)
+        got = normalize_date_column(dates)
+    bad = [(v, e, g) for v, e, g in zip(dates, expected, got) if e != g]
+    assert not bad, f"normalize_date mismatch: {bad}"
+    print(f"golden corpus: {len(money)} money and {len(dates)} date values identical")
+
+
+def streaming_export(path, rng, unclosed):
+    # Every kind of line the streamed reader must keep or drop as read_claims_file does
+    lines = ['Script,Total Paid,Date Dispensed,NDC,Drug Name,BIN']
+    kinds = rng.choice(['ok', 'short', 'trailing', 'extra', 'quoted', 'blank'], 3000,
+                       p=[0.8, 0.05, 0.04, 0.03, 0.05, 0.03])
+    for i, kind in enumerate(kinds):
+        lines.append({
+            'ok': f'S{i},{i % 97}.25,07/{i % 28 + 1:02d}/2025,00093-0150-{i % 100:02d},Drug {i},004336',
+            'short': f'S{i},1.50,2025-07-01',
+            'trailing': f'S{i},2.00,2025-07-02,00093015001,Drug {i},610014,',
+            'extra': f'S{i},2.00,2025-07-02,00093015001,Drug {i},610014,oops',
+            'quoted': f'S{i},"$1,234.00",2025-07-03,00093015001,"Drug\n""{i}""",003858',
+            'blank': '',
+        }[kind])
+        if unclosed and i == 2000:
+            lines.append(f'U{i},"unclosed,2025-07-01')
+    with open(path, 'w', newline='') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def check_streaming(rng):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'claims.csv')
+        for unclosed in (False, True):
+            streaming_export(path, rng, unclosed)
+            whole = read_claims_file(path)
+            mapping = claims_layout(whole.columns)['mapping']
+            expected = normalize_claims(whole, mapping)[0].reset_index(drop=True)
+            for rows in (1, 2, 7, 100, 5000):
+                streamed = pd.concat([chunk for chunk, _ in stream_claims_csv(path, mapping, rows)],
+                                     ignore_index=True)
+                assert expected.equals(streamed), f"streamed rows differ ({rows}-row chunks, unclosed={unclosed})"
+    print(f"streaming: {len(expected)} rows identical to the whole-file read at every chunk size")
+
+
+def synthetic_columns(n, rng):
+    amounts = rng.uniform(-50, 2000, n).round(2)
+    money = pd.Series(np.char.mod('%.2f', np.abs(amounts)), dtype=object)
+    dollars = rng.random(n) < 0.3
+    money[dollars] = '$' + money[dollars]
+    money[amounts < 0] = '(' + money[amounts < 0] + ')'
+    money[rng.random(n) < 0.02] = ''
+    qty = pd.Series(rng.choice(['1', '2', '30', '60', '90', '30.000', ' 15 ', ''], n), dtype=object)
+    days = pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, 92, n), unit='D')
+    dates = pd.Series(days.strftime('%m/%d/%Y'), dtype=object)
+    dates[rng.random(n) < 0.01] = ''
+    return money, qty, dates
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000])
+    ap.add_argument('--seed', type=int, default=42)
+    args = ap.parse_args()
+
+    check_golden()
+    rng = np.random.default_rng(args.seed)
+    check_streaming(rng)
+    columns = [('total_paid', clean_numeric, clean_numeric_column),
+               ('qty', clean_numeric, clean_numeric_column),
+               ('date_dispensed', normalize_date, normalize_date_column)]
+    print(f"{'rows':>8}  {'column':<15} {'per-cell':>9} {'column':>9} {'speedup':>8}")
+    for n in args.sizes:
+        for (name, per_cell, vectorized), values in zip(columns, synthetic_columns(n, rng)):
+            old, t_old = timed(values.apply, per_cell)
+            new, t_new = timed(vectorized, values)
+            same = old.equals(new) if name == 'date_dispensed' else same_floats(old, new)
+            assert same, f"{name} outputs differ at {n} rows"
+            print(f"{n:>8}  {name:<15} {t_old:>8.3f}s {t_new:>8.3f}s {t_old / t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
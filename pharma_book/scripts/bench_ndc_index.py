@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark NDC rate lookup (helpers/ndc_index.py) against the pandas joins it replaced.
+
+Synthetic baseline/alt_rates tables of 11-digit NDCs (overlapping, with brand and
+generic WAC rows) and claims that mostly hit them are priced three ways: the
+original three merges on NDC strings, ReferenceCache's indexed DataFrame join,
+and NdcPriceIndex.lookup(). The priced outputs are checked to be identical, then
+lookup time and throughput are printed. The index build is timed separately.
+An empty reference (a fresh install) is checked first to price like the join.
+
+Run: python scripts/bench_ndc_index.py [--sizes 10000 100000 1000000] [--ndcs 200000] [--seed 42]
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from helpers.ndc_index import NdcPriceIndex  # noqa: E402
+from helpers.pricing import price_claims  # noqa: E402
+
+PRICED = ['aac', 'method', 'expected_paid', 'difference', 'updated_diff']
+
+
+def synthetic_reference(n, rng):
+    ndcs = pd.Index(np.char.zfill(rng.choice(10 ** 11, n, replace=False).astype(str), 11))
+    in_baseline = rng.random(n) < 0.4
+    in_alt = rng.random(n) < 0.8
+    df_bas = pd.DataFrame({'ndc': ndcs[in_baseline], 'aac': rng.uniform(0, 5, in_baseline.sum()).round(5)})
+    m = in_alt.sum()
+    df_alt = pd.DataFrame({
+        'ndc': ndcs[in_alt],
+        'wac': rng.uniform(0, 500, m).round(2),
+        'pkg_size': rng.choice([0, 1, 30, 100, 500], m).astype(float),
+        'pkg_size_mult': rng.choice([0, 1, 2], m, p=[0.05, 0.8, 0.15]).astype(float),
+        'generic_indicator': rng.choice(['N', 'Y', ' n ', ''], m),
+    })
+    return ndcs, df_bas, df_alt
+
+
+def synthetic_claims(n, ndcs, rng):
+    known = rng.random(n) < 0.9
+    ndc = np.where(known, ndcs.to_numpy()[rng.integers(0, len(ndcs), n)],
+                   np.char.zfill(rng.integers(0, 10 ** 11, n).astype(str), 11))
+    return pd.DataFrame({
+        'ndc': ndc,
+        'qty': rng.choice([1, 2, 30, 60, 90], n).astype(float),
+        'total_paid': rng.uniform(0, 200, n).round(2),
+        'new_paid': np.where(rng.random(n) < 0.1, rng.uniform(0, 200, n).round(2), np.nan),
+    })
+
+
+def merge_join(claims, df_bas, df_alt):
+    # The dashboard's original per-refresh merges (the BIN merge is the same in every variant)
+    return claims.merge(df_bas, on='ndc', how='left').merge(df_alt, on='ndc', how='left', suffixes=('', '_alt'))
+
+
+def check_empty_reference(rng):
+    # Fresh install: no inclusion lists loaded yet, every claim is a miss
+    empty = pd.DataFrame({c: pd.Series(dtype=float) for c in NdcPriceIndex.FIELDS})
+    empty['generic_indicator'] = pd.Series(dtype=object)
+    empty.index = pd.Index([], dtype=object, name='ndc')
+    index = NdcPriceIndex.from_rates(empty)
+    claims = synthetic_claims(1000, pd.Index(['00093015001']), rng)
+    looked_up = pd.concat([claims, index.lookup(claims['ndc'], claims.index)], axis=1)
+    assert price_claims(claims.join(empty, on='ndc'))[PRICED].equals(price_claims(looked_up)[PRICED])
+    assert len(index.lookup(pd.Series([], dtype=object))) == 0
+    print("empty reference: no NDCs, every claim unpriced as with the join")
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    ap.add_argument('--ndcs', type=int, default=200_000, help='distinct NDCs in the reference tables')
+    ap.add_argument('--seed', type=int, default=42)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    check_empty_reference(rng)
+    ndcs, df_bas, df_alt = synthetic_reference(args.ndcs, rng)
+    rates = df_bas.set_index('ndc').join(df_alt.set_index('ndc'), how='outer')
+    index, t_build = timed(NdcPriceIndex.from_rates, rates)
+    print(f"index: {len(index)} NDCs built in {t_build * 1000:.1f} ms")
+    print(f"{'claims':>9} {'merge':>9} {'join':>9} {'index':>9} {'index rows/s':>13} {'vs merge':>9} {'vs join':>8}")
+    for n in args.sizes:
+        claims = synthetic_claims(n, ndcs, rng)
+        merged, t_merge = timed(merge_join, claims, df_bas, df_alt)
+        joined, t_join = timed(claims.join, rates, 'ndc')
+        looked_up, t_index = timed(index.lookup, claims['ndc'], claims.index)
+        looked_up = pd.concat([claims, looked_up], axis=1)
+        expected = price_claims(merged)[PRICED]
+        for other in (price_claims(joined)[PRICED], price_claims(looked_up)[PRICED]):
+            assert expected.equals(other), f"priced claims differ at {n} rows"
+        print(f"{n:>9} {t_merge:>8.3f}s {t_join:>8.3f}s {t_index:>8.3f}s {n / t_index:>13,.0f} "
+              f"{t_merge / t_index:>8.1f}x {t_join / t_index:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
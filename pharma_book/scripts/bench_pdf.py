@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDFHelper.save_pdf (pre-formatted columns, up-front pagination, page
+header form) against the row-by-row iterrows renderer it replaced.
+
+Both renderers draw the same synthetic underpaid report into a temp dir; the
+page counts are checked to match and pages/second printed for each.
+
+Run: python scripts/bench_pdf.py [--rows 5000 50000] [--seed 7]
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.pdfgen import canvas
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from helpers.pdf_helpers import PDFHelper  # noqa: E402
+
+
+def legacy_save_pdf(df_export, path, pbm, email=None):
+    c = canvas.Canvas(path, pagesize=landscape(letter))
+    w, h, m = landscape(letter)[0], landscape(letter)[1], 40
+    y = h - m
+    c.setFont("Helvetica-Bold",16)
+    c.drawCentredString(w/2, y, pbm)
+    y -= 24
+    if email:
+        c.setFont("Helvetica",10)
+        c.drawCentredString(w/2, y, email)
+        y -= 20
+    headers = ["Date","Script","Qty","AAC","Expected","Original Paid","Owed","Report"]
+    xs = [m,110,260,320,380,460,540,620]
+    c.setFont("Helvetica-Bold",10)
+    for x,hdr in zip(xs,headers):
+        c.drawString(x,y,hdr)
+    y -= 16
+    c.setFont("Helvetica",9)
+    for _, r in df_export.iterrows():
+        if y < m:
+            c.showPage(); y = h - m
+            c.setFont("Helvetica-Bold",16)
+            c.drawCentredString(w/2, y, pbm)
+            y -= 24
+            if email:
+                c.setFont("Helvetica",10)
+                c.drawCentredString(w/2, y, email)
+                y -= 20
+            c.setFont("Helvetica-Bold",10)
+            for x,hdr in zip(xs,headers):
+                c.drawString(x,y,hdr)
+            y -= 16
+            c.setFont("Helvetica",9)
+        c.drawString(xs[0], y, r['date_dispensed'].strftime('%Y-%m-%d') if pd.notna(r['date_dispensed']) else "")
+        c.drawString(xs[1], y, r['script'])
+        c.drawRightString(xs[2]+30, y, str(int(r['qty']) if pd.notna(r['qty']) else 0))
+        c.drawRightString(xs[3]+40, y, f"{r['aac']:.2f}")
+        c.drawRightString(xs[4]+50, y, f"{r['expected_paid']:.2f}")
+        c.drawRightString(xs[5]+50, y, f"{r['total_paid']:.2f}")
+        c.drawRightString(xs[6]+30, y, f"{r['difference']:.2f}")
+        c.drawString(xs[7], y, '')
+        y -= 16
+    c.save()
+    return path
+
+
+def synthetic_report(n, rng):
+    dates = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D')
+    aac = rng.uniform(0.01, 5, n).round(5)
+    qty = rng.choice([1, 30, 60, 90], n).astype(float)
+    expected = qty * aac + 10.64
+    paid = (expected - rng.uniform(0.01, 50, n)).round(2)
+    return pd.DataFrame({
+        'date_dispensed': pd.Series(dates).where(rng.random(n) > 0.01),
+        'script': rng.integers(1_000_000, 9_999_999, n).astype(str),
+        'qty': qty, 'aac': aac, 'expected_paid': expected,
+        'total_paid': paid, 'difference': paid - expected,
+        'pbm_name': 'CVS Caremark',
+    })
+
+
+def page_count(path):
+    with open(path, 'rb') as f:
+        return len(re.findall(rb'/Type /Page\b', f.read()))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument('--rows', type=int, nargs='+', default=[5_000, 50_000])
+    ap.add_argument('--seed', type=int, default=7)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    email = 'claims@example.com'
+    with tempfile.TemporaryDirectory() as tmp:
+        helper = PDFHelper(tmp)
+        print(f"{'rows':>8} {'pages':>6} {'iterrows p/s':>13} {'new p/s':>9} {'speedup':>8}")
+        for n in args.rows:
+            df = synthetic_report(n, rng)
+            t0 = time.perf_counter()
+            old = legacy_save_pdf(df, os.path.join(tmp, 'legacy.pdf'), 'CVS Caremark', email)
+            t_old = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            new = helper.save_pdf(df, 'bench', 'CVS Caremark', '2025-01-01', '2025-12-31', email=email)
+            t_new = time.perf_counter() - t0
+            pages = page_count(old)
+            if page_count(new) != pages:
+                raise AssertionError(f"page count differs: {page_count(new)} vs {pages}")
+            print(f"{n:>8} {pages:>6} {pages / t_old:>13.1f} {pages / t_new:>9.1f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Startup import report: what loading pharmacybooks.py costs before the login dialog.
+
+Imports the app module in a fresh interpreter under ``-X importtime``, prints the
+total and the slowest top-level imports, and exits non-zero if a module that
+should be deferred (pandas, ReportLab, openpyxl, tkcalendar, ...) is back on the
+startup path. For the full launch timeline, including the warm-up threads, run
+the app with PHARMABOOKS_STARTUP_REPORT=1.
+
+Run: python scripts/startup_report.py [--top 15]
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Loaded on first use or by the warm-up threads, never before the login dialog
+DEFERRED = ['pandas', 'numpy', 'pyarrow', 'reportlab', 'openpyxl', 'tkcalendar', 'win32com', 'email.message',
+            'helpers.db_helpers', 'helpers.pdf_helpers']
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode:
+        sys.exit(proc.stderr)
+    rows = []
+    for m in LINE.finditer(proc.stderr):
+        self_us, cumulative_us, indent, name = m.groups()
+        rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument('--top', type=int, default=15, help='slowest top-level imports to list')
+    args = ap.parse_args()
+
+    rows = import_times('pharmacybooks')
+    app = next(r for r in rows if r[0] == 'pharmacybooks')
+    print(f"import pharmacybooks: {app[2] / 1000:.1f} ms cumulative ({len(rows)} modules)")
+    top = sorted((r for r in rows if r[3] <= 1 and r[0] != 'pharmacybooks'), key=lambda r: -r[2])
+    for name, _, cumulative, _ in top[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    loaded = {r[0] for r in rows}
+    eager = [m for m in DEFERRED if m in loaded]
+    if eager:
+        print(f"Deferred modules imported at startup: {', '.join(eager)}")
+        return 1
+    print("No deferred module is imported at startup.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())